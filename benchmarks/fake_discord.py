@@ -0,0 +1,468 @@
+"""A local stand-in for Discord's gateway and REST API, for load testing the bot.
+
+Only the parts the bot uses are implemented: login, the gateway handshake, guild
+chunking, command sync and interaction responses. Point the bot at it with the
+`DISCORD_API_BASE` environment variable.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import statistics
+import time
+import typing as t
+
+from aiohttp import WSMsgType, web
+
+from src import log
+
+logger = log.get_logger(__name__)
+
+API_PREFIX = "/api/v10"
+HEARTBEAT_INTERVAL = 41250
+
+BOT_ID = 1000
+APPLICATION_ID = BOT_ID
+USER_ID = 2000
+OWNER_ID = 3000
+
+_snowflakes = itertools.count(10**17)
+
+
+def snowflake() -> str:
+    """Return a new unique ID."""
+    return str(next(_snowflakes))
+
+
+def user_payload(user_id: int, name: str, *, bot: bool = False) -> dict[str, t.Any]:
+    """Build a user object."""
+    return {
+        "id": str(user_id),
+        "username": name,
+        "global_name": name,
+        "discriminator": "0",
+        "avatar": None,
+        "bot": bot,
+    }
+
+
+def member_payload(user_id: int, name: str, *, bot: bool = False) -> dict[str, t.Any]:
+    """Build a guild member object."""
+    return {
+        "user": user_payload(user_id, name, bot=bot),
+        "roles": [],
+        "joined_at": "2024-01-01T00:00:00+00:00",
+        "deaf": False,
+        "mute": False,
+        "flags": 0,
+    }
+
+
+def channel_payload(guild_id: int) -> dict[str, t.Any]:
+    """Build the text channel of a guild, sharing the guild's ID."""
+    return {
+        "id": str(guild_id),
+        "guild_id": str(guild_id),
+        "type": 0,
+        "name": "general",
+        "position": 0,
+        "permission_overwrites": [],
+    }
+
+
+def guild_payload(guild_id: int) -> dict[str, t.Any]:
+    """Build a GUILD_CREATE payload with the bot and one user."""
+    return {
+        "id": str(guild_id),
+        "name": f"Guild {guild_id}",
+        "owner_id": str(OWNER_ID),
+        "member_count": 2,
+        "large": False,
+        "unavailable": False,
+        "features": [],
+        "emojis": [],
+        "stickers": [],
+        "voice_states": [],
+        "presences": [],
+        "threads": [],
+        "stage_instances": [],
+        "guild_scheduled_events": [],
+        "roles": [
+            {
+                "id": str(guild_id),
+                "name": "@everyone",
+                "permissions": "2248473465835073",
+                "position": 0,
+                "color": 0,
+                "hoist": False,
+                "managed": False,
+                "mentionable": False,
+            },
+        ],
+        "channels": [channel_payload(guild_id)],
+        "members": [
+            member_payload(BOT_ID, "bot", bot=True),
+            member_payload(USER_ID, "user"),
+        ],
+    }
+
+
+def message_payload(channel_id: int, body: dict[str, t.Any] | None = None) -> dict[str, t.Any]:
+    """Build a message sent by the bot, echoing the fields of a REST request body."""
+    body = body or {}
+    return {
+        "id": snowflake(),
+        "channel_id": str(channel_id),
+        "author": user_payload(BOT_ID, "bot", bot=True),
+        "content": body.get("content") or "",
+        "embeds": body.get("embeds") or [],
+        "components": body.get("components") or [],
+        "attachments": [],
+        "timestamp": "2024-01-01T00:00:00+00:00",
+        "edited_timestamp": None,
+        "tts": False,
+        "mention_everyone": False,
+        "mentions": [],
+        "mention_roles": [],
+        "pinned": False,
+        "type": 0,
+        "flags": body.get("flags") or 0,
+    }
+
+
+class LatencyRecorder:
+    """Record the time between sending an interaction and the bot responding to it."""
+
+    def __init__(self) -> None:
+        self.sent: dict[str, float] = {}
+        self.latencies: list[float] = []
+        self.rest_calls: dict[str, int] = {}
+        self.started = time.perf_counter()
+        self.finished: float | None = None
+
+    def on_sent(self, token: str) -> None:
+        """Record that an interaction was dispatched."""
+        self.sent[token] = time.perf_counter()
+        self.rest_calls[token] = 0
+
+    def on_rest_call(self, token: str, *, response: bool) -> None:
+        """Record a REST call made for an interaction, `response` for the initial one."""
+        if token in self.rest_calls:
+            self.rest_calls[token] += 1
+
+        sent = self.sent.pop(token, None)
+        if response and sent is not None:
+            self.latencies.append(time.perf_counter() - sent)
+            self.finished = time.perf_counter()
+
+    def summary(self) -> dict[str, float]:
+        """Return the latency percentiles in milliseconds and the throughput."""
+        if len(self.latencies) < 2:  # noqa: PLR2004
+            return {"responses": len(self.latencies), "unanswered": len(self.sent)}
+
+        cuts = statistics.quantiles(self.latencies, n=100)
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        calls = list(self.rest_calls.values())
+        return {
+            "responses": len(self.latencies),
+            "unanswered": len(self.sent),
+            "p50_ms": cuts[49] * 1000,
+            "p95_ms": cuts[94] * 1000,
+            "p99_ms": cuts[98] * 1000,
+            "max_ms": max(self.latencies) * 1000,
+            "throughput_per_s": len(self.latencies) / elapsed if elapsed else 0.0,
+            "rest_calls_per_interaction": statistics.fmean(calls) if calls else 0.0,
+        }
+
+
+class FakeDiscord:
+    """Serve a fake gateway and REST API on localhost.
+
+    Parameters
+    ----------
+    guilds : int
+        The amount of guilds the bot is in, spread across the shards.
+    shards : int
+        The shard count recommended to the bot.
+    host : str
+        The interface to listen on.
+    port : int
+        The port to listen on. 0 picks a free one.
+    """
+
+    def __init__(
+        self,
+        guilds: int = 10,
+        shards: int = 1,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        # shifted like snowflakes, so `shard_for` spreads them across the shards.
+        self.guild_ids = [(i << 22) | 1 for i in range(1, guilds + 1)]
+        self.shards = shards
+        self.host = host
+        self.port = port
+
+        self.commands: dict[str, dict[str, t.Any]] = {}
+        self.recorder = LatencyRecorder()
+        self.unknown_routes: dict[str, int] = {}
+
+        # shard_id -> websocket of the shard
+        self.sockets: dict[int, web.WebSocketResponse] = {}
+        self.ready_shards: set[int] = set()
+        self.commands_synced = asyncio.Event()
+
+        self._sequences: dict[int, int] = {}
+        self._runner: web.AppRunner | None = None
+
+        self.app = web.Application()
+        self.app.router.add_get("/gateway", self._gateway)
+        self.app.router.add_route("*", API_PREFIX + "/{path:.*}", self._rest)
+
+    @property
+    def api_base(self) -> str:
+        """Return the value for `DISCORD_API_BASE`."""
+        return f"http://{self.host}:{self.port}{API_PREFIX}"
+
+    async def start(self) -> None:
+        """Start listening."""
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+
+        if not self.port:
+            self.port = self._runner.addresses[0][1]
+        logger.info(f"Fake Discord listening on {self.api_base}")
+
+    async def stop(self) -> None:
+        """Close every connection and stop listening."""
+        for ws in list(self.sockets.values()):
+            await ws.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def wait_until_ready(self, timeout: float = 60.0) -> None:
+        """Wait until every shard received its guilds and the commands were synced."""
+
+        async def ready() -> None:
+            while len(self.ready_shards) < self.shards:
+                await asyncio.sleep(0.1)
+            await self.commands_synced.wait()
+
+        await asyncio.wait_for(ready(), timeout)
+
+    def shard_for(self, guild_id: int) -> int:
+        """Return the shard a guild belongs to, like Discord does."""
+        return (guild_id >> 22) % self.shards
+
+    # gateway
+
+    async def _send(self, shard_id: int, event: str, data: t.Any) -> None:  # noqa: ANN401
+        ws = self.sockets[shard_id]
+        seq = self._sequences[shard_id] = self._sequences.get(shard_id, 0) + 1
+        await ws.send_str(json.dumps({"op": 0, "t": event, "s": seq, "d": data}))
+
+    async def _gateway(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse(max_msg_size=0)
+        await ws.prepare(request)
+        await ws.send_str(json.dumps({"op": 10, "d": {"heartbeat_interval": HEARTBEAT_INTERVAL}}))
+
+        shard_id: int | None = None
+        async for msg in ws:
+            if msg.type != WSMsgType.TEXT:
+                continue
+
+            payload = json.loads(msg.data)
+            op, data = payload["op"], payload.get("d")
+
+            if op == 1:  # heartbeat
+                await ws.send_str(json.dumps({"op": 11}))
+            elif op == 2:  # identify  # noqa: PLR2004
+                shard_id = (data.get("shard") or [0, 1])[0]
+                self.sockets[shard_id] = ws
+                await self._identify(shard_id)
+            elif op == 8:  # request guild members  # noqa: PLR2004
+                await self._chunk(shard_id or 0, data)
+
+        if shard_id is not None:
+            self.sockets.pop(shard_id, None)
+            self.ready_shards.discard(shard_id)
+        return ws
+
+    async def _identify(self, shard_id: int) -> None:
+        guild_ids = [gid for gid in self.guild_ids if self.shard_for(gid) == shard_id]
+
+        await self._send(
+            shard_id,
+            "READY",
+            {
+                "v": 10,
+                "user": user_payload(BOT_ID, "bot", bot=True),
+                "guilds": [{"id": str(gid), "unavailable": True} for gid in guild_ids],
+                "session_id": snowflake(),
+                "resume_gateway_url": f"ws://{self.host}:{self.port}/gateway",
+                "shard": [shard_id, self.shards],
+                "application": {"id": str(APPLICATION_ID), "flags": 0},
+                "private_channels": [],
+            },
+        )
+        for gid in guild_ids:
+            await self._send(shard_id, "GUILD_CREATE", guild_payload(gid))
+
+        self.ready_shards.add(shard_id)
+
+    async def _chunk(self, shard_id: int, data: dict[str, t.Any]) -> None:
+        guild_id = int(data["guild_id"])
+        await self._send(
+            shard_id,
+            "GUILD_MEMBERS_CHUNK",
+            {
+                "guild_id": str(guild_id),
+                "members": guild_payload(guild_id)["members"],
+                "chunk_index": 0,
+                "chunk_count": 1,
+                "nonce": data.get("nonce"),
+            },
+        )
+
+    # interactions
+
+    async def send_command(
+        self,
+        name: str,
+        guild_id: int,
+        options: list[dict[str, t.Any]] | None = None,
+        *,
+        autocomplete: bool = False,
+    ) -> str:
+        """Dispatch a slash command (or its autocomplete) interaction, returning its token."""
+        command = self.commands.get(name)
+        if command is None:
+            msg = f"Command {name!r} was not synced by the bot."
+            raise KeyError(msg)
+
+        return await self._send_interaction(
+            guild_id,
+            4 if autocomplete else 2,
+            {"id": command["id"], "name": name, "type": 1, "options": options or []},
+        )
+
+    async def send_button_click(self, guild_id: int, custom_id: str) -> str:
+        """Dispatch a button click interaction, returning its token."""
+        message = message_payload(guild_id)
+        message["components"] = [
+            {
+                "type": 1,
+                "components": [{"type": 2, "style": 2, "custom_id": custom_id, "label": "x"}],
+            },
+        ]
+        return await self._send_interaction(
+            guild_id,
+            3,
+            {"custom_id": custom_id, "component_type": 2},
+            message=message,
+        )
+
+    async def _send_interaction(
+        self,
+        guild_id: int,
+        interaction_type: int,
+        data: dict[str, t.Any],
+        *,
+        message: dict[str, t.Any] | None = None,
+    ) -> str:
+        interaction_id = snowflake()
+        token = f"token-{interaction_id}"
+
+        member = member_payload(USER_ID, "user")
+        member["permissions"] = "2248473465835073"
+
+        payload: dict[str, t.Any] = {
+            "id": interaction_id,
+            "application_id": str(APPLICATION_ID),
+            "type": interaction_type,
+            "data": data,
+            "guild_id": str(guild_id),
+            "channel_id": str(guild_id),
+            "channel": channel_payload(guild_id),
+            "member": member,
+            "app_permissions": "2248473465835073",
+            "locale": "en-US",
+            "guild_locale": "en-US",
+            "token": token,
+            "version": 1,
+            "entitlements": [],
+            "authorizing_integration_owners": {"0": str(guild_id)},
+            "context": 0,
+        }
+        if message is not None:
+            payload["message"] = message
+
+        self.recorder.on_sent(token)
+        await self._send(self.shard_for(guild_id), "INTERACTION_CREATE", payload)
+        return token
+
+    # REST
+
+    async def _rest(self, request: web.Request) -> web.StreamResponse:  # noqa: C901, PLR0911
+        path = request.match_info["path"]
+        parts = path.split("/")
+        method = request.method
+        body = await request.json() if request.content_type == "application/json" else None
+
+        if path == "users/@me":
+            return web.json_response(user_payload(BOT_ID, "bot", bot=True))
+
+        if path == "gateway/bot":
+            return web.json_response(
+                {
+                    "url": f"ws://{self.host}:{self.port}/gateway",
+                    "shards": self.shards,
+                    "session_start_limit": {
+                        "total": 1000,
+                        "remaining": 1000,
+                        "reset_after": 0,
+                        "max_concurrency": 16,
+                    },
+                },
+            )
+
+        if path == "gateway":
+            return web.json_response({"url": f"ws://{self.host}:{self.port}/gateway"})
+
+        if parts[0] == "applications" and parts[-1] == "commands":
+            if method == "PUT":
+                self.commands = {
+                    command["name"]: {
+                        **command,
+                        "id": self.commands.get(command["name"], {}).get("id") or snowflake(),
+                        "application_id": str(APPLICATION_ID),
+                        "version": "1",
+                    }
+                    for command in body or []
+                }
+                self.commands_synced.set()
+            elif self.commands:
+                self.commands_synced.set()
+            return web.json_response(list(self.commands.values()))
+
+        # POST interactions/{id}/{token}/callback
+        if parts[0] == "interactions" and parts[-1] == "callback":
+            self.recorder.on_rest_call(parts[2], response=True)
+            return web.Response(status=204)
+
+        # webhooks/{application_id}/{token}[/messages/{message_id}]
+        if parts[0] == "webhooks" and len(parts) >= 3:  # noqa: PLR2004
+            self.recorder.on_rest_call(parts[2], response=False)
+            if method == "DELETE":
+                return web.Response(status=204)
+            return web.json_response(message_payload(0, body))
+
+        key = f"{method} {path}"
+        self.unknown_routes[key] = self.unknown_routes.get(key, 0) + 1
+        if self.unknown_routes[key] == 1:
+            logger.warning(f"Fake Discord has no route for {key}")
+        return web.json_response({"message": "Unknown route", "code": 0}, status=404)
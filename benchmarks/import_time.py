@@ -0,0 +1,73 @@
+"""Fail when importing `src.bot` exceeds the import-time budget.
+
+Run with `python -m benchmarks.import_time [--budget MS] [--module NAME]`. The budget
+defaults to the `IMPORT_BUDGET_MS` environment variable, or 1500 ms.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import typing as t
+
+# import time: self [us] | cumulative | imported package
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)$")
+
+
+def measure(module: str) -> tuple[float, list[tuple[float, str]]]:
+    """Import a module in a fresh interpreter with `-X importtime`.
+
+    Returns
+    -------
+    tuple[float, list[tuple[float, str]]]
+        The cumulative import time of the module in milliseconds, and the self time of
+        every imported module in milliseconds, slowest first.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],  # noqa: S603
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    cumulative = 0.0
+    modules: list[tuple[float, str]] = []
+    for line in result.stderr.splitlines():
+        if not (match := _LINE.match(line)):
+            continue
+
+        self_us, cumulative_us, name = match.groups()
+        modules.append((int(self_us) / 1000, name))
+        if name == module:
+            cumulative = int(cumulative_us) / 1000
+
+    modules.sort(reverse=True)
+    return cumulative, modules
+
+
+def main(argv: t.Sequence[str] | None = None) -> int:
+    """Print the slowest imports and exit non-zero when over budget."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--module", default="src.bot")
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=float(os.getenv("IMPORT_BUDGET_MS", "1500")),
+        help="The import-time budget in milliseconds.",
+    )
+    args = parser.parse_args(argv)
+
+    cumulative, modules = measure(args.module)
+    for self_ms, name in modules[:15]:
+        print(f"{self_ms:9.1f} ms  {name}")  # noqa: T201
+
+    summary = f"import {args.module}: {cumulative:.1f} ms (budget {args.budget:.0f} ms)"
+    print(f"\n{summary}")  # noqa: T201
+    return 0 if cumulative <= args.budget else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""Load test the bot against a fake Discord, run with `python -m benchmarks.load`.
+
+The bot runs unmodified in its own process, pointed at `benchmarks.fake_discord` with
+`DISCORD_API_BASE`. Interactions are dispatched over the gateway at a fixed rate and the
+time until the bot's first response reaches the fake REST API is recorded.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import typing as t
+
+from benchmarks.fake_discord import USER_ID, FakeDiscord, LatencyRecorder
+from src.components.trash import TrashState, trash_codec
+
+if t.TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+
+async def _ping(fake: FakeDiscord, guild_id: int) -> str:
+    return await fake.send_command(
+        "example",
+        guild_id,
+        [{"name": "ping", "type": 1, "options": []}],
+    )
+
+
+async def _help(fake: FakeDiscord, guild_id: int) -> str:
+    return await fake.send_command("help", guild_id)
+
+
+async def _help_autocomplete(fake: FakeDiscord, guild_id: int) -> str:
+    return await fake.send_command(
+        "help",
+        guild_id,
+        [{"name": "command", "type": 3, "value": "pi", "focused": True}],
+        autocomplete=True,
+    )
+
+
+async def _trash(fake: FakeDiscord, guild_id: int) -> str:
+    return await fake.send_button_click(guild_id, trash_codec.encode(TrashState(8192, USER_ID)))
+
+
+SCENARIOS: dict[str, Callable[[FakeDiscord, int], Awaitable[str]]] = {
+    "ping": _ping,
+    "help": _help,
+    "help_autocomplete": _help_autocomplete,
+    "trash": _trash,
+}
+
+
+async def replay(
+    fake: FakeDiscord,
+    scenario: str,
+    *,
+    rate: float,
+    duration: float,
+    drain: float = 5.0,
+) -> dict[str, float]:
+    """Dispatch `scenario` at `rate` interactions per second for `duration` seconds.
+
+    Parameters
+    ----------
+    fake : FakeDiscord
+        A server the bot is connected and ready on.
+    scenario : str
+        The name of the interaction to replay, see `SCENARIOS`.
+    rate : float
+        The amount of interactions dispatched per second, across every guild and shard.
+    duration : float
+        How long to dispatch for, in seconds.
+    drain : float
+        How long to wait for the last responses, in seconds.
+
+    Returns
+    -------
+    dict[str, float]
+        The latency percentiles and throughput, see `LatencyRecorder.summary`.
+    """
+    send = SCENARIOS[scenario]
+    loop = asyncio.get_running_loop()
+    interval = 1 / rate
+    total = int(rate * duration)
+
+    start = loop.time()
+    for i in range(total):
+        # catch up in bursts rather than drifting when the loop falls behind.
+        delay = start + i * interval - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await send(fake, fake.guild_ids[i % len(fake.guild_ids)])
+
+    deadline = loop.time() + drain
+    while fake.recorder.sent and loop.time() < deadline:
+        await asyncio.sleep(0.05)
+
+    return fake.recorder.summary()
+
+
+async def _run(args: argparse.Namespace) -> dict[str, float]:
+    fake = FakeDiscord(guilds=args.guilds, shards=args.shards)
+    await fake.start()
+
+    env = {
+        **os.environ,
+        "DISCORD_API_BASE": fake.api_base,
+        "TOKEN": "fake-token",
+    }
+    bot = await asyncio.create_subprocess_exec(
+        sys.executable,
+        "main.py",
+        env=env,
+        stdout=None if args.verbose else subprocess.DEVNULL,
+        stderr=None if args.verbose else subprocess.DEVNULL,
+    )
+
+    try:
+        await fake.wait_until_ready(args.ready_timeout)
+        # let the bot finish processing the guilds before the clock starts.
+        await asyncio.sleep(1)
+        fake.recorder = LatencyRecorder()
+        return await replay(fake, args.scenario, rate=args.rate, duration=args.duration)
+    finally:
+        if bot.returncode is None:
+            bot.terminate()
+            await bot.wait()
+        await fake.stop()
+
+
+def main(argv: t.Sequence[str] | None = None) -> None:
+    """Run a scenario and print its results as JSON, for comparing runs."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scenario", choices=SCENARIOS, default="ping")
+    parser.add_argument("--rate", type=float, default=100.0, help="interactions per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--guilds", type=int, default=10)
+    parser.add_argument("--shards", type=int, default=1)
+    parser.add_argument("--ready-timeout", type=float, default=60.0)
+    parser.add_argument("--verbose", action="store_true", help="show the bot's output")
+    args = parser.parse_args(argv)
+
+    results = {"scenario": args.scenario, "rate": args.rate, **asyncio.run(_run(args))}
+    print(json.dumps(results, indent=2))  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Micro-benchmark of `Localization.get`, run with `python -m benchmarks.localize`."""
+
+from __future__ import annotations
+
+import json
+import tempfile
+import timeit
+import typing as t
+from pathlib import Path
+
+from disnake import Locale
+
+from src.util.localize import Localization, LocalizedStr
+
+STRINGS: dict[str, dict[str, str]] = {
+    "static": {"en-US": "No commands available.", "es": "No hay comandos disponibles."},
+    "greeting": {"en-US": "Hello {user}, welcome to {guild}!", "es": "¡Hola {user}!"},
+}
+
+
+class _Store:
+    """A minimal stand-in for `disnake.LocalizationStore`."""
+
+    def get(self, key: str) -> dict[str, str] | None:
+        return STRINGS.get(key)
+
+    def load(self, _: t.Any) -> None:  # noqa: ANN401
+        pass
+
+
+def _baseline_get(
+    store: _Store,
+    default: str,
+    locale: Locale,
+    key: str,
+    **placeholders: str,
+) -> LocalizedStr:
+    """`Localization.get` before the compiled index."""
+    localizations = store.get(key)
+    if localizations is None:
+        return LocalizedStr(default.format(**placeholders))
+
+    localized_string = localizations.get(locale.value, default)
+    return LocalizedStr(localized_string.format(**placeholders))
+
+
+def main(number: int = 200_000) -> None:
+    """Print the per-call cost of both implementations."""
+    store = _Store()
+    localization = Localization(store)  # type: ignore[reportArgumentType]
+
+    with tempfile.TemporaryDirectory() as lang:
+        for locale in ("en-US", "es"):
+            strings = {key: texts[locale] for key, texts in STRINGS.items()}
+            Path(lang, f"{locale}.json").write_text(json.dumps(strings), encoding="utf-8")
+        localization.load(lang)
+
+    cases = {
+        "static": ("static", {}),
+        "placeholders": ("greeting", {"user": "Ose", "guild": "Bots"}),
+    }
+    for name, (key, placeholders) in cases.items():
+        before = timeit.timeit(
+            lambda key=key, placeholders=placeholders: _baseline_get(
+                store,
+                "default",
+                Locale.en_US,
+                key,
+                **placeholders,
+            ),
+            number=number,
+        )
+        after = timeit.timeit(
+            lambda key=key, placeholders=placeholders: localization.get(
+                "default",
+                Locale.en_US,
+                key,
+                **placeholders,
+            ),
+            number=number,
+        )
+        print(  # noqa: T201
+            f"{name:>12}: before {before / number * 1e9:7.0f} ns/call, "
+            f"after {after / number * 1e9:7.0f} ns/call",
+        )
+
+
+if __name__ == "__main__":
+    main()
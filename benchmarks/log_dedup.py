@@ -0,0 +1,33 @@
+"""Per-call overhead of `DedupFilter`, run with `python -m benchmarks.log_dedup`."""
+
+from __future__ import annotations
+
+import logging
+import timeit
+
+from src.log import DedupFilter
+
+
+def main(number: int = 200_000) -> None:
+    """Print the cost of filtering unique, duplicate and below-level records."""
+    dedup = DedupFilter(window=3600)
+
+    def make(level: int, msg: str) -> logging.LogRecord:
+        return logging.LogRecord("bench", level, __file__, 0, msg, None, None)
+
+    counter = iter(range(number * 2))
+    cases = {
+        "baseline (record creation)": lambda: make(logging.ERROR, "GET failed - 503"),
+        "below level": lambda: dedup.filter(make(logging.INFO, "Extension loaded")),
+        "duplicate": lambda: dedup.filter(make(logging.ERROR, "GET failed - 503")),
+        "unique": lambda: dedup.filter(make(logging.ERROR, f"GET failed - {next(counter)}")),
+    }
+    for name, case in cases.items():
+        elapsed = timeit.timeit(case, number=number)
+        print(f"{name:>28}: {elapsed / number * 1e9:7.0f} ns/call")  # noqa: T201
+
+    print(f"{'suppressed':>28}: {dedup.suppressed}")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Compare event loop backends, run with `python -m benchmarks.loop_backends`.
+
+By default interactions are dispatched synthetically: every interaction is a new task, like
+disnake dispatching an event, whose handler makes its REST callback to a local aiohttp
+server on the same loop. With `--harness` the real bot is load tested through
+`benchmarks.load` instead. Each backend runs in its own process.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import typing as t
+
+from aiohttp import ClientSession, TCPConnector, web
+
+from src.util import loop as event_loop
+
+BACKENDS: tuple[tuple[str, bool], ...] = (
+    ("asyncio", False),
+    ("asyncio", True),
+    ("uvloop", False),
+    ("uvloop", True),
+)
+
+
+async def _callback(request: web.Request) -> web.Response:
+    await request.read()
+    return web.Response(status=204)
+
+
+async def _dispatch(interactions: int, concurrency: int) -> dict[str, float]:
+    app = web.Application()
+    app.router.add_post("/interactions/{id}/{token}/callback", _callback)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    url = f"http://127.0.0.1:{runner.addresses[0][1]}"
+
+    latencies: list[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with ClientSession(connector=TCPConnector(limit=concurrency)) as session:
+
+        async def handle(index: int, dispatched: float) -> None:
+            async with session.post(
+                f"{url}/interactions/{index}/token/callback",
+                json={"type": 4, "data": {"content": "Pong!"}},
+            ) as response:
+                await response.read()
+            latencies.append(time.perf_counter() - dispatched)
+            semaphore.release()
+
+        started = time.perf_counter()
+        tasks: list[asyncio.Task[None]] = []
+        for index in range(interactions):
+            await semaphore.acquire()
+            tasks.append(asyncio.create_task(handle(index, time.perf_counter())))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    await runner.cleanup()
+
+    cuts = statistics.quantiles(latencies, n=100)
+    return {
+        "throughput_per_s": interactions / elapsed,
+        "p50_ms": cuts[49] * 1000,
+        "p95_ms": cuts[94] * 1000,
+        "p99_ms": cuts[98] * 1000,
+    }
+
+
+def _run_backend(backend: str, *, eager: bool, args: argparse.Namespace) -> dict[str, float]:
+    if args.harness:
+        command = [sys.executable, "-m", "benchmarks.load", f"--scenario={args.scenario}"]
+        command += [f"--rate={args.rate}", f"--duration={args.duration}"]
+    else:
+        command = [sys.executable, "-m", "benchmarks.loop_backends", "--child"]
+        command += [f"--interactions={args.interactions}", f"--concurrency={args.concurrency}"]
+
+    result = subprocess.run(
+        command,  # noqa: S603
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "EVENT_LOOP": backend, "EAGER_TASKS": "1" if eager else "0"},
+    )
+    output = result.stdout
+    return json.loads(output[output.index("{") :])
+
+
+def main(argv: t.Sequence[str] | None = None) -> None:
+    """Run every backend and print their throughput and latency."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--interactions", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--harness", action="store_true", help="load test the real bot")
+    parser.add_argument("--scenario", default="ping", help="with --harness")
+    parser.add_argument("--rate", type=float, default=500.0, help="with --harness")
+    parser.add_argument("--duration", type=float, default=10.0, help="with --harness")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        results = event_loop.run(
+            _dispatch(args.interactions, args.concurrency),
+            backend=t.cast(event_loop.Backend, os.environ["EVENT_LOOP"]),
+            eager_tasks=os.environ["EAGER_TASKS"] == "1",
+        )
+        print(json.dumps(results))  # noqa: T201
+        return
+
+    available = {name for _, name in map(event_loop.loop_factory, ("asyncio", "uvloop"))}
+    eager_supported = sys.version_info >= (3, 12)
+
+    for backend, eager in BACKENDS:
+        label = f"{backend}{' + eager' if eager else ''}"
+        if backend not in available or (eager and not eager_supported):
+            print(f"{label:>16}: unavailable")  # noqa: T201
+            continue
+
+        results = _run_backend(backend, eager=eager, args=args)
+        print(  # noqa: T201
+            f"{label:>16}: {results['throughput_per_s']:8.0f}/s  "
+            f"p50 {results['p50_ms']:6.2f} ms  p95 {results['p95_ms']:6.2f} ms  "
+            f"p99 {results['p99_ms']:6.2f} ms",
+        )
+
+
+if __name__ == "__main__":
+    main()
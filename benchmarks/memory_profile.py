@@ -0,0 +1,134 @@
+"""RSS per 1k guilds for each memory profile, run with `python -m benchmarks.memory_profile`.
+
+Synthetic GUILD_CREATE payloads are fed straight into the bot's connection state, each
+profile running in its own process so the measurements don't affect each other.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import subprocess
+import sys
+import typing as t
+
+import psutil
+
+PROFILES = ("minimal", "interactions", "full")
+BOT_ID = 1
+
+
+def guild_payload(guild_id: int, *, members: int, channels: int, roles: int) -> dict[str, t.Any]:
+    """Build a GUILD_CREATE payload resembling a small community guild."""
+    return {
+        "id": str(guild_id),
+        "name": f"Guild {guild_id}",
+        "owner_id": str(BOT_ID + 1),
+        "member_count": members,
+        "large": members > 250,  # noqa: PLR2004
+        "features": [],
+        "emojis": [],
+        "stickers": [],
+        "voice_states": [],
+        "presences": [],
+        "threads": [],
+        "stage_instances": [],
+        "guild_scheduled_events": [],
+        "roles": [
+            {
+                "id": str(guild_id if i == 0 else guild_id * 100 + i),
+                "name": "@everyone" if i == 0 else f"role {i}",
+                "permissions": "104324673",
+                "position": i,
+                "color": 0,
+                "hoist": False,
+                "managed": False,
+                "mentionable": False,
+            }
+            for i in range(roles)
+        ],
+        "channels": [
+            {
+                "id": str(guild_id * 1000 + i),
+                "type": 0,
+                "name": f"channel-{i}",
+                "position": i,
+                "permission_overwrites": [],
+            }
+            for i in range(channels)
+        ],
+        "members": [
+            {
+                "user": {
+                    "id": str(BOT_ID if i == 0 else guild_id * 100_000 + i),
+                    "username": f"user{i}",
+                    "discriminator": "0",
+                    "avatar": None,
+                },
+                "roles": [],
+                "joined_at": "2024-01-01T00:00:00+00:00",
+                "deaf": False,
+                "mute": False,
+            }
+            for i in range(members)
+        ],
+    }
+
+
+async def _run(profile: str, guilds: int, members: int) -> float:
+    from src import constants
+    from src.bot import Bot
+
+    options = constants.memory_profile_options(profile)  # type: ignore[reportArgumentType]
+    bot = Bot(**options, owner_ids=set(), reload=False)
+    state = bot._connection  # noqa: SLF001
+
+    # without the members intent Discord only sends the bot's own member.
+    sent_members = members if options["intents"].members else 1
+
+    gc.collect()
+    before = psutil.Process().memory_info().rss
+    for guild_id in range(1, guilds + 1):
+        state._add_guild_from_data(  # noqa: SLF001
+            guild_payload(guild_id + 10, members=sent_members, channels=20, roles=10),  # type: ignore[reportArgumentType]
+        )
+    gc.collect()
+    after = psutil.Process().memory_info().rss
+
+    await bot.close()
+    return (after - before) / guilds * 1000
+
+
+def main(argv: t.Sequence[str] | None = None) -> None:
+    """Measure every profile, or a single one with `--profile`."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--profile", choices=PROFILES)
+    parser.add_argument("--guilds", type=int, default=2000)
+    parser.add_argument("--members", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    if args.profile:
+        print(asyncio.run(_run(args.profile, args.guilds, args.members)))  # noqa: T201
+        return
+
+    for profile in PROFILES:
+        result = subprocess.run(
+            [  # noqa: S603
+                sys.executable,
+                "-m",
+                "benchmarks.memory_profile",
+                f"--profile={profile}",
+                f"--guilds={args.guilds}",
+                f"--members={args.members}",
+            ],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        per_1k = float(result.stdout.strip().splitlines()[-1])
+        print(f"{profile:>12}: {per_1k / 1024 / 1024:8.1f} MiB per 1k guilds")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Idle CPU cost and reload latency of inotify versus mtime polling.
+
+Run with `python -m benchmarks.reload_watch [modules] [idle seconds]`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from src.util.watch import ReloadWatcher
+
+POLL_INTERVAL = 1.0
+
+
+async def _poll(files: list[Path], changed: asyncio.Event) -> None:
+    """Check the mtime of every file on a timer, the way disnake's reload watcher does."""
+    mtimes = {file: file.stat().st_mtime_ns for file in files}
+    while True:
+        await asyncio.sleep(POLL_INTERVAL)
+        for file in files:
+            mtime = file.stat().st_mtime_ns
+            if mtime != mtimes[file]:
+                mtimes[file] = mtime
+                changed.set()
+
+
+async def _measure(name: str, files: list[Path], idle: float, *, inotify: bool) -> None:
+    changed = asyncio.Event()
+    watcher: ReloadWatcher | None = None
+    poller: asyncio.Task[None] | None = None
+
+    if inotify:
+        watcher = ReloadWatcher([files[0].parent], lambda _: changed.set(), debounce=0.05)
+        watcher.start()
+    else:
+        poller = asyncio.create_task(_poll(files, changed))
+
+    cpu = time.process_time()
+    await asyncio.sleep(idle)
+    idle_cpu = time.process_time() - cpu
+
+    # a burst of edits, which should be reported once.
+    started = time.perf_counter()
+    for _ in range(3):
+        files[0].write_text(f"# {time.time()}\n")
+    await changed.wait()
+    latency = time.perf_counter() - started
+
+    if watcher is not None:
+        watcher.stop()
+    if poller is not None:
+        poller.cancel()
+
+    print(  # noqa: T201
+        f"{name:>8}: idle CPU {idle_cpu / idle * 100:6.3f}% of a core, "
+        f"reload latency {latency * 1000:7.1f} ms",
+    )
+
+
+async def main(modules: int = 500, idle: float = 5.0) -> None:
+    """Watch `modules` files with both strategies."""
+    with tempfile.TemporaryDirectory() as tmp:
+        files = [Path(tmp, f"module_{i}.py") for i in range(modules)]
+        for file in files:
+            file.write_text("")
+
+        print(f"{modules} files, {idle}s idle, pid {os.getpid()}")  # noqa: T201
+        await _measure("polling", files, idle, inotify=False)
+        await _measure("inotify", files, idle, inotify=True)
+
+
+if __name__ == "__main__":
+    args = [float(arg) for arg in sys.argv[1:]]
+    asyncio.run(main(int(args[0]) if args else 500, args[1] if len(args) > 1 else 5.0))
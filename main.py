@@ -1,35 +1,66 @@
+from __future__ import annotations
+
 import asyncio
 import os
 import signal
 import sys
+import time
 
 import disnake
+import psutil
+from disnake import http as disnake_http
+from disnake.ext import commands
 
 from src import constants, log
 from src.bot import Bot
+from src.cluster import ClusterIPC, Supervisor, fetch_recommended_shards
 from src.constants import Client
+from src.util import loop as event_loop
 
 logger = log.get_logger(__name__)
 
-_intents = disnake.Intents.all()
+if Client.api_base:
+    # the gateway URL is fetched from the API, so it follows along.
+    disnake_http.Route.BASE = Client.api_base
+
 
+async def main(cluster: ClusterIPC | None = None) -> None:
+    """Start bot, or a single worker of the cluster if `cluster` is given."""
+    # everything between the interpreter starting and here is spent importing.
+    imports = time.time() - psutil.Process().create_time()
 
-async def main() -> None:
-    """Start bot."""
     bot = Bot(
-        intents=_intents,
+        **constants.memory_profile_options(constants.Client.memory_profile),
         owner_ids=set(constants.Client.owner_ids),
         reload=constants.Client.reload,
+        command_sync_flags=(
+            commands.CommandSyncFlags.none() if constants.Client.lazy_extensions else None
+        ),
+        shard_ids=cluster.shard_ids if cluster else None,
+        shard_count=cluster.shard_count if cluster else Client.shard_count,
+        cluster=cluster,
     )
+    bot.startup.record("Imports", imports)
 
-    bot.i18n.load("src/lang/")  # type: ignore[reportUnknownMemberType]
+    with bot.startup.phase("i18n load"):
+        bot.localization.load_bundle("src/lang.bundle", fallback="src/lang/")
 
     try:
-        bot.load_extensions("src/exts")
+        with bot.startup.phase("Extensions"):
+            bot.load_extensions(
+                "src/exts",
+                manifest=(
+                    constants.Client.extension_manifest
+                    if constants.Client.lazy_extensions
+                    else None
+                ),
+            )
     except Exception:
         await bot.close()
         raise
 
+    bot.watch_for_changes("src/exts", "src/lang/")
+
     logger.info("Bot is starting.")
 
     try:
@@ -60,5 +91,26 @@ async def main() -> None:
             await bot.close()
 
 
+def run_worker(cluster: ClusterIPC) -> None:
+    """Run a worker process of the cluster."""
+    try:
+        event_loop.run(main(cluster), backend=Client.event_loop, eager_tasks=Client.eager_tasks)
+    finally:
+        log.shutdown()
+
+
+def run_cluster() -> int:
+    """Split the shards across `Client.cluster_workers` processes and supervise them."""
+    shard_count = Client.shard_count or asyncio.run(fetch_recommended_shards(Client.token or ""))
+    return Supervisor(run_worker, shard_count, Client.cluster_workers).run()
+
+
 if __name__ == "__main__":
-    sys.exit(asyncio.run(main()))
+    try:
+        if Client.cluster_workers > 1:
+            sys.exit(run_cluster())
+        sys.exit(
+            event_loop.run(main(), backend=Client.event_loop, eager_tasks=Client.eager_tasks),
+        )
+    finally:
+        log.shutdown()
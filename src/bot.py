@@ -1,18 +1,46 @@
 from __future__ import annotations
 
+import contextlib
 import datetime as dt
-import os
+import time
+import typing as t
+from pathlib import Path
 
 import disnake
+import psutil
 from disnake.ext import commands, tasks
 from helply import Helply
 
 from src import constants, log
+from src.components.router import router
+from src.util.health import HealthSampler
 from src.util.http import APIHTTPClient
+from src.util.lazy import LazyExtensions, discover_extensions
 from src.util.localize import Localization
+from src.util.metrics import BotMetrics, MetricsServer
+from src.util.page_cache import PageCache
+from src.util.pool import create_connector
+from src.util.startup import StartupTimer
+from src.util.watch import Inotify, ReloadWatcher
+
+if t.TYPE_CHECKING:
+    import asyncio
+    from collections.abc import Callable, Coroutine
+
+    from src.cluster import ClusterIPC
 
 logger = log.get_logger(__name__)
 
+_COMMAND_ERROR_EVENTS = frozenset(
+    {"slash_command_error", "user_command_error", "message_command_error"},
+)
+
+
+def _command_kind(interaction: disnake.ApplicationCommandInteraction) -> str:
+    if interaction.data.type is disnake.ApplicationCommandType.chat_input:
+        return "slash"
+    return interaction.data.type.name
+
 
 class Bot(commands.AutoShardedInteractionBot):
     """Base bot instance.
@@ -27,9 +55,24 @@ class Bot(commands.AutoShardedInteractionBot):
         All the IDs of the owners of this bot.
     reload : bool
         Whether to enable automatic extension reloading on file modification for debugging.
+        On Linux this uses inotify, see `watch_for_changes`, otherwise disnake's polling.
     test_guilds: list[int] | None
         This will set whether the bot will only use specific guilds for testing.
         Do not use this in production!
+    command_sync_flags: commands.CommandSyncFlags | None
+        Which application command syncing features to enable. Defaults to disnake's default.
+    member_cache_flags: disnake.MemberCacheFlags | None
+        Which members to cache. Defaults to what the intents allow.
+    max_messages: int | None
+        The maximum amount of messages to cache. None disables the message cache.
+    chunk_guilds_at_startup: bool | None
+        Whether to request every guild's members at startup. Defaults to the members intent.
+    shard_ids: list[int] | None
+        The shards to run. Defaults to every shard.
+    shard_count: int | None
+        The total amount of shards. Defaults to Discord's recommendation.
+    cluster: ClusterIPC | None
+        The connection to the cluster supervisor when running as a worker, see `src.cluster`.
     """
 
     def __init__(  # noqa: PLR0913
@@ -40,33 +83,127 @@ class Bot(commands.AutoShardedInteractionBot):
         owner_ids: set[int],
         reload: bool,
         test_guilds: list[int] | None = None,
+        command_sync_flags: commands.CommandSyncFlags | None = None,
+        member_cache_flags: disnake.MemberCacheFlags | None = None,
+        max_messages: int | None = 1000,
+        chunk_guilds_at_startup: bool | None = None,
+        shard_ids: list[int] | None = None,
+        shard_count: int | None = None,
+        cluster: ClusterIPC | None = None,
     ) -> None:
         """We initialize the bot class here."""
+        self._watch_reload = reload and Inotify.supported()
+
         super().__init__(
             intents=intents,
             allowed_mentions=allowed_mentions,
             owner_ids=owner_ids,
-            reload=reload,
+            reload=reload and not self._watch_reload,
             test_guilds=test_guilds,
+            command_sync_flags=command_sync_flags,
+            member_cache_flags=member_cache_flags,
+            max_messages=max_messages,
+            chunk_guilds_at_startup=chunk_guilds_at_startup,
+            shard_ids=shard_ids,
+            shard_count=shard_count,
         )
 
         self.helply = Helply(self)
 
         self.start_time: dt.datetime = dt.datetime.now(tz=dt.timezone.utc)
+        self.startup = StartupTimer()
+        self.lazy_extensions: LazyExtensions | None = None
+        self.reload_watcher: ReloadWatcher | None = None
+        self._lang_path: Path | None = None
+        self.cluster = cluster
         self.localization = Localization(self.i18n)
 
-        self.http_client: APIHTTPClient = APIHTTPClient()
+        # see `src.util.metrics`, served on /metrics when `constants.Metrics.serve` is set.
+        self.metrics: BotMetrics | None = BotMetrics() if constants.Metrics.enabled else None
+        self.metrics_server: MetricsServer | None = None
+        if self.metrics is not None:
+            timed_request = self.metrics.wrap_discord_request(self.http.request)
+            self.http.request = timed_request  # type: ignore[reportAttributeAccessIssue]
+
+        # rendered /help overview pages, shared by every member seeing the same commands.
+        self.help_pages = PageCache(
+            "help_pages",
+            requests=self.metrics.cache_requests if self.metrics else None,
+        )
+
+        self.health: HealthSampler | None = (
+            HealthSampler(
+                constants.Health.interval,
+                log_interval=constants.Health.log_interval,
+                debug=constants.Health.debug_slow_steps,
+                slow_threshold=constants.Health.slow_step_threshold,
+                registry=self.metrics.registry if self.metrics else None,
+            )
+            if constants.Health.enabled
+            else None
+        )
+
+        connector = (
+            create_connector(
+                limit=constants.HTTP.pool_limit,
+                limit_per_host=constants.HTTP.pool_limit_per_host,
+                dns_cache_ttl=constants.HTTP.dns_cache_ttl,
+                keepalive_timeout=constants.HTTP.keepalive_timeout,
+                happy_eyeballs_delay=constants.HTTP.happy_eyeballs_delay,
+            )
+            if constants.HTTP.pooled
+            else None
+        )
+        self.http_client: APIHTTPClient = APIHTTPClient(
+            connector,
+            trace_configs=[self.metrics.trace_config()] if self.metrics else None,
+        )
+        if self.metrics is not None:
+            self.metrics.watch_http_client(self.http_client)
+
+    async def start(self, token: str, *, reconnect: bool = True) -> None:
+        """Log in and connect to the gateway, timing the connection."""
+        if self.cluster is not None:
+            self.cluster.attach(self)
+        if self.metrics is not None and constants.Metrics.serve:
+            port = constants.Metrics.port + (self.cluster.cluster_id if self.cluster else 0)
+            self.metrics_server = MetricsServer(self.metrics.registry, constants.Metrics.host, port)
+            await self.metrics_server.start()
+        if self.health is not None:
+            self.health.start()
+        self.startup.begin("Gateway connect")
+        await super().start(token, reconnect=reconnect)
 
     async def on_connect(self) -> None:
         """Execute when bot is connected to the Discord API."""
+        self.startup.end("Gateway connect")
+        self.startup.begin("First on_ready")
 
     async def on_ready(self) -> None:
         """Execute when bot is ready and cache is populated."""
-        msg = constants.generate_startup_table(bot_name=self.user.name, bot_id=self.user.id)
+        self.startup.end("First on_ready")
+        msg = constants.generate_startup_table(
+            bot_name=self.user.name,
+            bot_id=self.user.id,
+            phases=self.startup.phases,
+        )
         logger.info(f"\n{msg}")
 
         self.loop_activities.start()
 
+    async def close(self) -> None:
+        """Close the HTTP client and the connection to Discord."""
+        if self.reload_watcher is not None:
+            self.reload_watcher.stop()
+        if self.cluster is not None:
+            self.cluster.detach()
+        if self.health is not None:
+            self.health.stop()
+        if self.metrics_server is not None:
+            await self.metrics_server.stop()
+        await self.http_client.close()
+        await super().close()
+
     @tasks.loop(minutes=5)
     async def loop_activities(self) -> None:
         """Loop between activities."""
@@ -83,24 +220,235 @@ class Bot(commands.AutoShardedInteractionBot):
             await self.change_presence(activity=None, status=constants.Client.activity_status)
             self.loop_activities.stop()
 
-    def load_extensions(self, path: str) -> None:
+    def load_extensions(self, path: str, *, manifest: str | None = None) -> None:
         """Load all bot extensions.
 
         Parameters
         ----------
         path: str
             The path where the extensions are found.
+        manifest: str | None
+            The manifest built by `python -m src.util.lazy`. When given, extensions are only
+            imported the first time one of their commands, autocompletes or listeners is used.
+            Falls back to loading everything if the manifest can't be read.
         """
-        for item in os.listdir(path):
-            if "__" in item or not item.endswith(".py"):
-                continue
-
-            ext = f"src.exts.{item[:-3]}"
+        if manifest is not None:
             try:
-                super().load_extension(ext)
-                logger.info(f"Extension loaded: {item}")
-            except commands.errors.NoEntryPointError as e:  # Setup function not found
-                logger.critical(f"{e.name} has no setup function.")
+                self.lazy_extensions = LazyExtensions.from_file(manifest)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Unable to read extension manifest, loading eagerly: {e}")
+            else:
+                logger.info(f"Deferred {len(self.lazy_extensions.pending)} extension(s)")
+                if self.metrics is not None:
+                    self.metrics.lazy_extensions_pending.set(
+                        value=len(self.lazy_extensions.pending),
+                    )
+                return
+
+        for ext in discover_extensions(path):
+            self._load_extension(ext)
+
+    def _load_extension(self, ext: str) -> None:
+        try:
+            super().load_extension(ext)
+            logger.info(f"Extension loaded: {ext.rpartition('.')[2]}.py")
+        except commands.errors.NoEntryPointError as e:  # Setup function not found
+            logger.critical(f"{e.name} has no setup function.")
+
+    def _load_lazy_extension(self, ext: str) -> None:
+        """Import and wire a deferred extension, measuring what it costs."""
+        if self.lazy_extensions is None:
+            return
+
+        process = psutil.Process()
+        rss = process.memory_info().rss
+        started = time.perf_counter()
+
+        self._load_extension(ext)
+
+        seconds = time.perf_counter() - started
+        grown = process.memory_info().rss - rss
+        self.lazy_extensions.mark_loaded(ext, seconds, grown)
+        logger.info(f"Lazily loaded {ext} in {seconds * 1000:.0f} ms (+{grown // 1024} KiB RSS)")
+
+        if self.metrics is not None:
+            self.metrics.lazy_extension_load.set(ext, value=seconds)
+            self.metrics.lazy_extension_rss.set(ext, value=grown)
+            self.metrics.lazy_extensions_pending.set(value=len(self.lazy_extensions.pending))
+
+    def watch_for_changes(self, extensions: str, lang: str) -> None:
+        """Reload extensions and language files as soon as they change on disk.
+
+        Only the changed extension or language file is reloaded. Does nothing unless reloading
+        is enabled and inotify is available.
+
+        Parameters
+        ----------
+        extensions: str
+            The path where the extensions are found.
+        lang: str
+            The path where the language files are found.
+        """
+        if not self._watch_reload or self.reload_watcher is not None:
+            return
+
+        self._lang_path = Path(lang).resolve()
+        self.reload_watcher = ReloadWatcher([extensions, lang], self._reload_changed)
+        self.reload_watcher.start()
+
+    async def _sync_application_commands(self) -> None:
+        """Sync the application commands, then let caches of the command tree know of changes.
+
+        Listeners of `on_command_tree_changed` should drop anything derived from the commands.
+        Nothing is dispatched when syncing is disabled or didn't change any command, so lazily
+        loaded extensions aren't imported at startup just to clear their empty caches.
+        """
+        before = self._synced_commands()
+        await super()._sync_application_commands()
+        if self._synced_commands() != before:
+            self.dispatch("command_tree_changed")
+
+    def _synced_commands(self) -> frozenset[tuple[int, int]]:
+        """Return the ID and version of every command registered with Discord."""
+        state = self._connection
+        commands_ = [
+            *state._global_application_commands.values(),  # noqa: SLF001
+            *(
+                command
+                for guild_commands in state._guild_application_commands.values()  # noqa: SLF001
+                for command in guild_commands.values()
+            ),
+        ]
+        return frozenset((command.id, command.version) for command in commands_)
+
+    def _reload_changed(self, paths: set[Path]) -> None:
+        changed = False
+        for path in sorted(paths):
+            if path.suffix == ".json":
+                changed |= self._reload_language_file(path)
+            elif path.suffix == ".py" and "__" not in path.name:
+                changed |= self._reload_extension_file(path)
+
+        if changed:
+            self.dispatch("command_tree_changed")
+
+    def _reload_language_file(self, path: Path) -> bool:
+        """Reload a changed language file, returning whether the strings changed."""
+        # e.g. the lazy-load manifest isn't a language file.
+        if path.parent.resolve() != self._lang_path:
+            return False
+
+        try:
+            self.localization.reload_file(path)
+        except ValueError:
+            logger.exception(f"Unable to reload {path.name}")
+            return False
+        return True
+
+    def _reload_extension_file(self, path: Path) -> bool:
+        """Reload, unload or load the extension of a changed file, returning whether it did."""
+        ext = f"src.exts.{path.stem}"
+        deferred = self.lazy_extensions is not None and ext in self.lazy_extensions.pending
+        try:
+            if ext in self.extensions:
+                if path.exists():
+                    self.reload_extension(ext)
+                    logger.info(f"Extension reloaded: {path.name}")
+                else:
+                    self.unload_extension(ext)
+                    logger.info(f"Extension unloaded: {path.name}")
+                return True
+
+            # deferred extensions will be imported from the new file on first use.
+            if path.exists() and not deferred:
+                self._load_extension(ext)
+                return True
+        except commands.ExtensionError:
+            logger.exception(f"Unable to reload {path.name}")
+        return False
+
+    async def process_application_commands(
+        self,
+        interaction: disnake.ApplicationCommandInteraction,
+    ) -> None:
+        """Load the extension of a deferred command before invoking it, and time it."""
+        name = interaction.data.name
+        if self.lazy_extensions and (ext := self.lazy_extensions.for_command(name)):
+            self._load_lazy_extension(ext)
+
+        async with self._track_command(name, _command_kind(interaction)):
+            await super().process_application_commands(interaction)
+
+    async def process_app_command_autocompletion(
+        self,
+        inter: disnake.ApplicationCommandInteraction,
+    ) -> None:
+        """Load the extension of a deferred command before running its autocomplete, and time it."""
+        if self.lazy_extensions and (ext := self.lazy_extensions.for_command(inter.data.name)):
+            self._load_lazy_extension(ext)
+
+        async with self._track_command(inter.data.name, "autocomplete"):
+            await super().process_app_command_autocompletion(inter)
+
+    def _track_command(
+        self,
+        name: str,
+        kind: str,
+    ) -> contextlib.AbstractAsyncContextManager[None]:
+        if self.metrics is None:
+            return contextlib.nullcontext()
+        return self.metrics.track_command(name, kind)
+
+    async def on_message_interaction(self, inter: disnake.MessageInteraction) -> None:
+        """Route a component interaction to the handler of its custom ID prefix.
+
+        See `src.components.router`. The extension of a deferred handler is loaded first.
+        """
+        prefix = (inter.data.custom_id or "").partition(":")[0]
+        if self.lazy_extensions and (ext := self.lazy_extensions.for_component(prefix)):
+            self._load_lazy_extension(ext)
+
+        # free-form IDs, e.g. of views, would add a label set per click.
+        label = prefix if prefix in router else "unrouted"
+        async with self._track_command(label, "component"):
+            await router.dispatch(inter)
+
+    def _remove_module_references(self, name: str) -> None:
+        """Forget the component handlers of an unloaded or reloaded extension."""
+        router.remove_module(name)
+        super()._remove_module_references(name)
+
+    def dispatch(self, event_name: str, *args: t.Any, **kwargs: t.Any) -> None:  # noqa: ANN401
+        """Load deferred extensions listening to an event before dispatching it."""
+        if self.lazy_extensions and self.lazy_extensions.has_listeners:
+            for ext in self.lazy_extensions.for_event(f"on_{event_name}"):
+                self._load_lazy_extension(ext)
+
+        if self.metrics is not None and event_name in _COMMAND_ERROR_EVENTS and args:
+            # disnake handles command errors itself, so they never reach `_track_command`.
+            inter: disnake.ApplicationCommandInteraction = args[0]
+            self.metrics.command_errors.inc(inter.data.name, event_name.partition("_")[0])
+
+        super().dispatch(event_name, *args, **kwargs)
+
+    def _schedule_event(
+        self,
+        coro: Callable[..., Coroutine[t.Any, t.Any, t.Any]],
+        event_name: str,
+        *args: t.Any,  # noqa: ANN401
+        **kwargs: t.Any,  # noqa: ANN401
+    ) -> asyncio.Task[None]:
+        """Time every listener of an event."""
+        if self.metrics is not None:
+            coro = self.metrics.wrap_listener(coro, event_name)
+        return super()._schedule_event(coro, event_name, *args, **kwargs)
+
+    @property
+    def total_guild_count(self) -> int:
+        """Return the amount of guilds served by the whole cluster, or by this bot alone."""
+        if self.cluster is not None and self.cluster.workers:
+            return self.cluster.guild_count
+        return len(self.guilds)
 
     async def get_or_fetch_owners(self) -> list[disnake.User]:
         """Get owners from cache, or fetch them and cache."""
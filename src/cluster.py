@@ -0,0 +1,305 @@
+"""Run the bot's shards across several worker processes.
+
+The supervisor splits the shard range across the workers, restarts workers that die and
+relays their health over pipes, so every worker knows the state of the whole cluster.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import multiprocessing
+import signal
+import time
+import typing as t
+from multiprocessing.connection import Connection, wait
+
+import psutil
+from disnake import http as disnake_http
+
+from src import log
+from src.util.http import APIHTTPClient, Route
+
+if t.TYPE_CHECKING:
+    from collections.abc import Callable
+    from multiprocessing.process import BaseProcess
+
+    from src.bot import Bot
+
+logger = log.get_logger(__name__)
+
+__all__ = (
+    "ClusterIPC",
+    "Supervisor",
+    "fetch_recommended_shards",
+    "split_shards",
+)
+
+HEALTH_INTERVAL: float = 10.0
+# a worker that stayed up this long is considered healthy again.
+STABLE_AFTER: float = 300.0
+MAX_RESTART_DELAY: float = 60.0
+
+
+def split_shards(shard_count: int, workers: int) -> list[list[int]]:
+    """Split `range(shard_count)` into `workers` contiguous, near-equal ranges."""
+    workers = max(1, min(workers, shard_count))
+    size, extra = divmod(shard_count, workers)
+
+    ranges: list[list[int]] = []
+    start = 0
+    for i in range(workers):
+        end = start + size + (i < extra)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+
+async def fetch_recommended_shards(token: str) -> int:
+    """Ask Discord how many shards the bot should use."""
+    client = APIHTTPClient()
+    try:
+        data = await client.request(
+            Route("GET", f"{disnake_http.Route.BASE}/gateway/bot"),
+            headers={"Authorization": f"Bot {token}"},
+        )
+    finally:
+        await client.close()
+
+    if not isinstance(data, dict):
+        msg = f"Unexpected /gateway/bot response: {data!r}"
+        raise TypeError(msg)
+    return int(data["shards"])
+
+
+class ClusterIPC:
+    """The worker side of the cluster, reporting health and receiving the cluster's state.
+
+    Parameters
+    ----------
+    cluster_id : int
+        The index of this worker.
+    shard_ids : list[int]
+        The shards this worker runs.
+    shard_count : int
+        The total amount of shards in the cluster.
+    conn : Connection
+        This worker's end of the pipe to the supervisor.
+    """
+
+    def __init__(
+        self,
+        cluster_id: int,
+        shard_ids: list[int],
+        shard_count: int,
+        conn: Connection,
+    ) -> None:
+        self.cluster_id = cluster_id
+        self.shard_ids = shard_ids
+        self.shard_count = shard_count
+        self.conn = conn
+
+        # cluster_id -> latest health report of that worker, including this one.
+        self.workers: dict[int, dict[str, t.Any]] = {}
+
+        self._bot: Bot | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    def attach(self, bot: Bot) -> None:
+        """Start reporting the health of `bot` and listening for the cluster's state."""
+        self._bot = bot
+        loop = asyncio.get_running_loop()
+        loop.add_reader(self.conn.fileno(), self._on_message)
+        self._task = loop.create_task(self._report_loop())
+
+    def detach(self) -> None:
+        """Stop reporting."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        with contextlib.suppress(RuntimeError, OSError):
+            asyncio.get_running_loop().remove_reader(self.conn.fileno())
+
+    def health(self) -> dict[str, t.Any]:
+        """Return the health report of this worker."""
+        bot = self._bot
+        return {
+            "cluster_id": self.cluster_id,
+            "shard_ids": self.shard_ids,
+            "ready": bool(bot and bot.is_ready()),
+            "guilds": len(bot.guilds) if bot else 0,
+            "latencies": dict(bot.latencies) if bot else {},
+            "rss": psutil.Process().memory_info().rss,
+            "reported_at": time.time(),
+        }
+
+    async def _report_loop(self) -> None:
+        while True:
+            try:
+                self.conn.send(("health", self.health()))
+            except (BrokenPipeError, OSError):
+                logger.warning("Lost the connection to the cluster supervisor")
+                return
+            await asyncio.sleep(HEALTH_INTERVAL)
+
+    def _on_message(self) -> None:
+        try:
+            kind, payload = self.conn.recv()
+        except (EOFError, OSError):
+            self.detach()
+            return
+
+        if kind == "cluster":
+            self.workers = {int(cluster_id): health for cluster_id, health in payload.items()}
+
+    @property
+    def guild_count(self) -> int:
+        """Return the amount of guilds served by the whole cluster."""
+        return sum(health["guilds"] for health in self.workers.values())
+
+
+class Supervisor:
+    """Spawn, supervise and restart the worker processes of a cluster.
+
+    Parameters
+    ----------
+    target : Callable[[ClusterIPC], None]
+        Runs the bot in a worker process. Must be importable, e.g. a module-level function.
+    shard_count : int
+        The total amount of shards.
+    workers : int
+        The amount of worker processes to split the shards across.
+    """
+
+    def __init__(
+        self,
+        target: Callable[[ClusterIPC], None],
+        shard_count: int,
+        workers: int,
+    ) -> None:
+        self.target = target
+        self.shard_count = shard_count
+        self.ranges = split_shards(shard_count, workers)
+
+        self.health: dict[int, dict[str, t.Any]] = {}
+
+        self._context = multiprocessing.get_context("spawn")
+        self._processes: dict[int, BaseProcess] = {}
+        self._conns: dict[int, Connection] = {}
+        self._started_at: dict[int, float] = {}
+        self._restarts: dict[int, int] = {}
+        self._restart_at: dict[int, float] = {}
+        self._stopping = False
+
+    def _spawn(self, cluster_id: int) -> None:
+        parent, child = self._context.Pipe()
+        ipc = ClusterIPC(cluster_id, self.ranges[cluster_id], self.shard_count, child)
+
+        process = self._context.Process(
+            target=self.target,
+            args=(ipc,),
+            name=f"cluster-{cluster_id}",
+        )
+        process.start()
+        child.close()
+
+        self._processes[cluster_id] = process
+        self._conns[cluster_id] = parent
+        self._started_at[cluster_id] = time.monotonic()
+        logger.info(
+            f"Cluster {cluster_id} started (pid {process.pid}, "
+            f"shards {self.ranges[cluster_id][0]}-{self.ranges[cluster_id][-1]})",
+        )
+
+    def _stop(self, *_: t.Any) -> None:  # noqa: ANN401
+        self._stopping = True
+
+    def run(self) -> int:
+        """Run the cluster until SIGINT or SIGTERM is received."""
+        signal.signal(signal.SIGINT, self._stop)
+        signal.signal(signal.SIGTERM, self._stop)
+
+        logger.info(f"Starting {len(self.ranges)} cluster(s) for {self.shard_count} shard(s)")
+        for cluster_id in range(len(self.ranges)):
+            self._spawn(cluster_id)
+
+        try:
+            while not self._stopping:
+                self._poll()
+        finally:
+            self.shutdown()
+        return 0
+
+    def _poll(self) -> None:
+        sentinels = {process.sentinel: cid for cid, process in self._processes.items()}
+        conns = {conn: cid for cid, conn in self._conns.items()}
+
+        for ready in wait([*sentinels, *conns], timeout=1.0):
+            if ready in conns:
+                self._receive(conns[ready])  # type: ignore[reportArgumentType]
+            elif ready in sentinels:
+                self._on_exit(sentinels[ready])  # type: ignore[reportArgumentType]
+
+        now = time.monotonic()
+        for cluster_id, restart_at in list(self._restart_at.items()):
+            if now >= restart_at and not self._stopping:
+                del self._restart_at[cluster_id]
+                self._spawn(cluster_id)
+
+    def _receive(self, cluster_id: int) -> None:
+        try:
+            kind, payload = self._conns[cluster_id].recv()
+        except (EOFError, OSError):
+            return
+
+        if kind == "health":
+            self.health[cluster_id] = payload
+            self._broadcast()
+
+    def _broadcast(self) -> None:
+        for conn in self._conns.values():
+            with contextlib.suppress(BrokenPipeError, OSError):
+                conn.send(("cluster", self.health))
+
+    def _on_exit(self, cluster_id: int) -> None:
+        process = self._processes.pop(cluster_id)
+        self._conns.pop(cluster_id).close()
+        self.health.pop(cluster_id, None)
+        process.join()
+
+        if self._stopping:
+            return
+
+        if time.monotonic() - self._started_at[cluster_id] >= STABLE_AFTER:
+            self._restarts[cluster_id] = 0
+        restarts = self._restarts.get(cluster_id, 0)
+        self._restarts[cluster_id] = restarts + 1
+
+        delay = min(2.0**restarts, MAX_RESTART_DELAY)
+        logger.error(
+            f"Cluster {cluster_id} exited with code {process.exitcode}, "
+            f"restarting in {delay:.0f}s",
+        )
+        self._restart_at[cluster_id] = time.monotonic() + delay
+
+    def shutdown(self, timeout: float = 30.0) -> None:
+        """Terminate every worker, killing the ones that don't exit in time."""
+        self._stopping = True
+
+        for process in self._processes.values():
+            if process.is_alive():
+                process.terminate()
+
+        deadline = time.monotonic() + timeout
+        for cluster_id, process in self._processes.items():
+            process.join(max(deadline - time.monotonic(), 0))
+            if process.is_alive():
+                logger.warning(f"Cluster {cluster_id} did not stop in time, killing it")
+                process.kill()
+                process.join()
+
+        for conn in self._conns.values():
+            conn.close()
+        self._processes.clear()
+        self._conns.clear()
+        logger.info("All clusters stopped.")
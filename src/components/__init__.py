@@ -1,7 +1,10 @@
+from .router import ComponentRouter, CustomIdCodec
 from .support import SupportInvite
 from .trash import TRASH_BUTTON_CUSTOM_ID, TrashButton
 
 __all__ = (
+    "ComponentRouter",
+    "CustomIdCodec",
     "TrashButton",
     "TRASH_BUTTON_CUSTOM_ID",
     "SupportInvite",
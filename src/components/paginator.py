@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import typing as t
+
+import disnake
+
+from src.components.router import CustomIdCodec
+
+
+class PageState(t.NamedTuple):
+    """The state of a stateless paginator, stored in the custom ID of its buttons."""
+
+    action: str
+    page: int
+    fingerprint: str
+    locale: str
+    user_id: int
+
+
+page_codec = CustomIdCodec("hp", PageState)
+
+
+def page_buttons(
+    page: int,
+    total: int,
+    fingerprint: str,
+    locale: str,
+    user_id: int,
+) -> list[disnake.ui.Button[None]]:
+    """Build the buttons of a stateless paginator showing `page` out of `total`.
+
+    Everything needed to render another page is stored in the custom IDs by `page_codec`,
+    so no view is kept in memory and the buttons keep working after a restart.
+
+    Parameters
+    ----------
+    page : int
+        The index of the shown page.
+    total : int
+        The amount of pages.
+    fingerprint : str
+        Identifies the command set the pages were rendered from.
+    locale : str
+        The locale the pages were rendered in.
+    user_id : int
+        The user allowed to turn the pages.
+    """
+
+    def custom_id(action: str, page: int) -> str:
+        return page_codec.encode(PageState(action, page, fingerprint, locale, user_id))
+
+    return [
+        disnake.ui.Button(
+            emoji="◀️",
+            style=disnake.ButtonStyle.secondary,
+            custom_id=custom_id("p", max(page - 1, 0)),
+            disabled=page <= 0,
+        ),
+        disnake.ui.Button(
+            label=f"{page + 1}/{total}",
+            style=disnake.ButtonStyle.secondary,
+            custom_id=custom_id("i", page),
+            disabled=True,
+        ),
+        disnake.ui.Button(
+            emoji="▶️",
+            style=disnake.ButtonStyle.secondary,
+            custom_id=custom_id("n", min(page + 1, total - 1)),
+            disabled=page >= total - 1,
+        ),
+    ]
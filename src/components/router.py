@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+import string
+import typing as t
+
+import disnake
+
+from src import log
+
+if t.TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Mapping
+
+logger = log.get_logger(__name__)
+
+__all__ = (
+    "ComponentRouter",
+    "CustomIdCodec",
+    "b36decode",
+    "b36encode",
+    "router",
+)
+
+MAX_CUSTOM_ID_LENGTH = 100
+
+S = t.TypeVar("S", bound=tuple[t.Any, ...])
+Handler = t.Callable[[disnake.MessageInteraction, t.Any], t.Awaitable[None]]
+
+_ALPHABET = string.digits + string.ascii_lowercase
+
+
+def b36encode(value: int) -> str:
+    """Encode an integer in base 36, e.g. a snowflake in 12 characters instead of 19."""
+    if value < 0:
+        return "-" + b36encode(-value)
+    if value < 36:  # noqa: PLR2004
+        return _ALPHABET[value]
+
+    chars: list[str] = []
+    while value:
+        value, remainder = divmod(value, 36)
+        chars.append(_ALPHABET[remainder])
+    return "".join(reversed(chars))
+
+
+def b36decode(value: str) -> int:
+    """Decode an integer encoded with `b36encode`.
+
+    Raises
+    ------
+    ValueError
+        If `value` isn't valid base 36.
+    """
+    # `int` also accepts whitespace and underscores, which `b36encode` never writes.
+    digits = value.removeprefix("-")
+    if not digits.isalnum() or not digits.isascii():
+        msg = f"Invalid base 36 value: {value!r}"
+        raise ValueError(msg)
+    return int(value, 36)
+
+
+def _encode_str(value: str) -> str:
+    return value.replace("%", "%25").replace(".", "%2E").replace(":", "%3A")
+
+
+def _decode_str(value: str) -> str:
+    return value.replace("%3A", ":").replace("%2E", ".").replace("%25", "%")
+
+
+def _decode_bool(value: str) -> bool:
+    if value not in ("0", "1"):
+        msg = f"Invalid boolean: {value!r}"
+        raise ValueError(msg)
+    return value == "1"
+
+
+# marks the fields without a default, which are always encoded.
+_REQUIRED = object()
+
+_ENCODERS: dict[type, Callable[[t.Any], str]] = {
+    int: b36encode,
+    str: _encode_str,
+    bool: lambda value: "1" if value else "0",
+}
+_DECODERS: dict[type, Callable[[str], t.Any]] = {
+    int: b36decode,
+    str: _decode_str,
+    bool: _decode_bool,
+}
+
+
+class CustomIdCodec(t.Generic[S]):
+    """Pack the state of a component into a compact, versioned custom ID.
+
+    Custom IDs look like `<prefix>:<version>:<field>.<field>...`. Integers are written
+    in base 36, and trailing fields equal to their default are left out.
+
+    Parameters
+    ----------
+    prefix : str
+        Identifies the component type, keep it short. Letters, digits, `-` and `_` only.
+    state : type[S]
+        A `typing.NamedTuple` of `int`, `str` and `bool` fields.
+    version : int
+        Bump it when the fields change, and decode the previous versions with `legacy`.
+    legacy : Mapping[int, Callable[[str], S | None]] | None
+        Decoders of the payloads written by previous versions, by version.
+
+    Raises
+    ------
+    ValueError
+        If the prefix contains invalid characters.
+    TypeError
+        If a field of `state` isn't an `int`, `str` or `bool`.
+    """
+
+    def __init__(
+        self,
+        prefix: str,
+        state: type[S],
+        *,
+        version: int = 1,
+        legacy: Mapping[int, Callable[[str], S | None]] | None = None,
+    ) -> None:
+        if not prefix or not set(prefix) <= set(string.ascii_letters + string.digits + "-_"):
+            msg = f"Invalid custom ID prefix: {prefix!r}"
+            raise ValueError(msg)
+
+        self.prefix = prefix
+        self.state = state
+        self.version = version
+        self.legacy = dict(legacy or {})
+
+        hints = t.get_type_hints(state)
+        fields: tuple[str, ...] = getattr(state, "_fields", ())
+        for name in fields:
+            if hints[name] not in _ENCODERS:
+                msg = f"{state.__name__}.{name} must be an int, str or bool, not {hints[name]}."
+                raise TypeError(msg)
+
+        defaults: dict[str, t.Any] = getattr(state, "_field_defaults", {})
+        self._encoders = tuple(_ENCODERS[hints[name]] for name in fields)
+        self._decoders = tuple(_DECODERS[hints[name]] for name in fields)
+        self._defaults = tuple(defaults.get(name, _REQUIRED) for name in fields)
+        self._required = len(fields) - len(defaults)
+        self._version = b36encode(version)
+        self._head = f"{prefix}:{self._version}:"
+
+    def encode(self, state: S) -> str:
+        """Return the custom ID storing `state`.
+
+        Raises
+        ------
+        ValueError
+            If the custom ID would be longer than Discord allows.
+        """
+        end = len(state)
+        while end > self._required and state[end - 1] == self._defaults[end - 1]:
+            end -= 1
+
+        custom_id = self._head + ".".join(
+            [encode(value) for encode, value in zip(self._encoders, state[:end])],
+        )
+        if len(custom_id) > MAX_CUSTOM_ID_LENGTH:
+            msg = f"Custom ID is {len(custom_id)} characters long: {custom_id}"
+            raise ValueError(msg)
+        return custom_id
+
+    def decode(self, rest: str) -> S | None:
+        """Return the state stored after the prefix of a custom ID, or None if it is invalid."""
+        version, _, payload = rest.partition(":")
+        if version != self._version:
+            try:
+                decode = self.legacy.get(b36decode(version))
+            except ValueError:
+                return None
+            return decode(payload) if decode is not None else None
+
+        # an empty payload is either every field left out, or a single empty string.
+        values = payload.split(".") if payload or self._required else []
+        if not self._required <= len(values) <= len(self._decoders):
+            return None
+
+        try:
+            decoded = [decode(value) for decode, value in zip(self._decoders, values)]
+        except ValueError:
+            return None
+
+        decoded.extend(self._defaults[len(values) :])
+        return self.state._make(decoded)  # type: ignore[reportAttributeAccessIssue]
+
+
+class Decoder(t.Protocol[S]):
+    """Anything turning the part of a custom ID after its prefix into a state."""
+
+    prefix: str
+
+    def decode(self, rest: str) -> S | None:
+        """Return the state, or None if `rest` is invalid."""
+        ...
+
+
+class ComponentRouter:
+    """Route every component interaction to the single handler of its custom ID prefix.
+
+    Instead of every component listener being called for every click and checking the
+    custom ID itself, the prefix is looked up once and only its handler runs.
+    """
+
+    def __init__(self) -> None:
+        self._routes: dict[str, tuple[Decoder[t.Any], Handler]] = {}
+
+    def add(self, decoder: Decoder[S], handler: Callable[[t.Any, S], Awaitable[None]]) -> None:
+        """Route the custom IDs of `decoder` to `handler`, replacing any previous handler."""
+        previous = self._routes.get(decoder.prefix)
+        if previous is not None and previous[1].__module__ != handler.__module__:
+            logger.warning(
+                f"Component prefix {decoder.prefix!r} of {previous[1].__module__} is "
+                f"taken over by {handler.__module__}",
+            )
+        self._routes[decoder.prefix] = (decoder, handler)
+
+    def route(
+        self,
+        decoder: Decoder[S],
+    ) -> Callable[
+        [Callable[[t.Any, S], Awaitable[None]]],
+        Callable[[t.Any, S], Awaitable[None]],
+    ]:
+        """Register the decorated coroutine as the handler of `decoder`'s custom IDs."""
+
+        def decorator(
+            handler: Callable[[t.Any, S], Awaitable[None]],
+        ) -> Callable[[t.Any, S], Awaitable[None]]:
+            self.add(decoder, handler)
+            return handler
+
+        return decorator
+
+    def remove_module(self, name: str) -> None:
+        """Remove the handlers defined in a module, e.g. an unloaded extension."""
+        for prefix, (_, handler) in list(self._routes.items()):
+            if handler.__module__ == name or handler.__module__.startswith(f"{name}."):
+                del self._routes[prefix]
+
+    def __contains__(self, prefix: object) -> bool:
+        """Whether a handler is registered for a custom ID prefix."""
+        return prefix in self._routes
+
+    @property
+    def prefixes(self) -> set[str]:
+        """Return the routed prefixes."""
+        return set(self._routes)
+
+    async def dispatch(self, inter: disnake.MessageInteraction) -> bool:
+        """Call the handler of a component interaction, returning whether there was one."""
+        prefix, _, rest = (inter.data.custom_id or "").partition(":")
+        route = self._routes.get(prefix)
+        if route is None:
+            return False
+
+        decoder, handler = route
+        state = decoder.decode(rest)
+        if state is None:
+            logger.debug(f"Ignoring invalid custom ID: {inter.data.custom_id}")
+            return False
+
+        await handler(inter, state)
+        return True
+
+
+# the router of every component, dispatched to by the bot.
+router = ComponentRouter()
@@ -1,16 +1,44 @@
 from __future__ import annotations
 
+import typing as t
+
 import disnake
 
+from src.components.router import CustomIdCodec
 from src.constants import Emoji
 
 TRASH_BUTTON_CUSTOM_ID = "TRASH:"
 
 
+class TrashState(t.NamedTuple):
+    """The state of a trash button, stored in its custom ID."""
+
+    perms: int
+    user_id: int
+    message_id: int = 0
+
+
+class _LegacyTrashCodec:
+    """Decode the `TRASH:<perms>:<user_id>[:<message_id>]` custom IDs of older buttons."""
+
+    prefix = TRASH_BUTTON_CUSTOM_ID.rstrip(":")
+
+    def decode(self, rest: str) -> TrashState | None:
+        try:
+            perms, user_id, *message_id = (int(part) for part in rest.split(":"))
+        except ValueError:
+            return None
+        return TrashState(perms, user_id, message_id[0] if message_id else 0)
+
+
+trash_codec = CustomIdCodec("tr", TrashState)
+legacy_trash_codec = _LegacyTrashCodec()
+
+
 class TrashButton(disnake.ui.Button[None]):
     """A button that will delete the message when clicked.
 
-    This button uses low-level component listeners (@bot.listen('on_button_click')
+    Clicks are routed to its handler by `src.components.router`, see `trash_codec`.
     """
 
     def __init__(  # noqa: PLR0913
@@ -24,22 +52,18 @@ class TrashButton(disnake.ui.Button[None]):
     ) -> None:
         super().__init__()
 
-        self.custom_id = TRASH_BUTTON_CUSTOM_ID
-
         user_id = user.id if isinstance(user, (disnake.User | disnake.Member)) else user
 
         permissions = disnake.Permissions()
         if allow_manage_messages:
             permissions.manage_messages = True
 
-        self.custom_id += f"{permissions.value}:"
-        self.custom_id += str(user_id)
-
-        if initial_message:
-            if isinstance(initial_message, (disnake.Message | disnake.InteractionMessage)):
-                initial_message = initial_message.id
+        if isinstance(initial_message, (disnake.Message | disnake.InteractionMessage)):
+            initial_message = initial_message.id
 
-            self.custom_id += f":{initial_message}"
+        self.custom_id = trash_codec.encode(
+            TrashState(permissions.value, user_id, initial_message or 0),
+        )
 
         if style is None:
             if initial_message:
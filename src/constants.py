@@ -4,7 +4,7 @@ import datetime as dt
 import os
 import sys as s
 from itertools import cycle
-from typing import TYPE_CHECKING, Any, Iterable, Mapping
+from typing import TYPE_CHECKING, Any, Iterable, Literal, Mapping, cast
 
 import disnake
 from disnake import __version__ as disnake_version
@@ -57,9 +57,33 @@ class Client:
     support_server = "https://example.com"
 
     token: str | None = os.getenv("TOKEN")
+    # send REST and gateway traffic elsewhere, e.g. to `benchmarks.fake_discord`.
+    api_base: str | None = os.getenv("DISCORD_API_BASE")
 
     reload = True
 
+    # "auto" uses uvloop when it is installed, see `src.util.loop`.
+    event_loop = cast(Literal["auto", "asyncio", "uvloop"], os.getenv("EVENT_LOOP", "auto"))
+    # start tasks eagerly on Python 3.12+, saving a loop iteration per task.
+    eager_tasks: bool = os.getenv("EAGER_TASKS", "0") == "1"
+
+    # split the shards across this many worker processes, see `src.cluster`. 1 disables it.
+    cluster_workers: int = 1
+    # None uses Discord's recommended shard count.
+    shard_count: int | None = None
+
+    # how much of Discord's state is received and cached, see `memory_profile_options`.
+    memory_profile: Literal["minimal", "interactions", "full"] = "full"
+
+    # import extensions on first use, see `src.util.lazy`.
+    # disables command syncing, as commands aren't known before their extension is imported.
+    lazy_extensions = False
+    extension_manifest = "src/exts/manifest.json"
+
+    # page /help with buttons carrying their state in their custom ID, instead of a view
+    # kept in memory per message, see `src.components.paginator`.
+    stateless_help = True
+
     admin_permissions: Permissions = disnake.Permissions(administrator=True)
     standard_permissions: Permissions = disnake.Permissions(
         change_nickname=True,
@@ -78,6 +102,43 @@ class Client:
     )
 
 
+class HTTP:
+    """Config of the HTTP client used for external APIs."""
+
+    pooled: bool = True
+
+    pool_limit: int = 100
+    pool_limit_per_host: int = 10
+    dns_cache_ttl: int = 300
+    keepalive_timeout: float = 30.0
+    happy_eyeballs_delay: float | None = 0.25
+
+
+class Metrics:
+    """Config of the command, listener and HTTP metrics, see `src.util.metrics`."""
+
+    enabled: bool = True
+
+    # serve the metrics on http://host:port/metrics in Prometheus text format.
+    serve: bool = os.getenv("METRICS_PORT") is not None
+    host: str = "127.0.0.1"
+    # cluster workers listen on this port plus their cluster id.
+    port: int = int(os.getenv("METRICS_PORT") or 9100)
+
+
+class Health:
+    """Config of the process health sampler, see `src.util.health`."""
+
+    enabled: bool = True
+    interval: float = 10.0
+    # log the latest sample this often, None to only show it in /stats.
+    log_interval: float | None = 300.0
+
+    # log the stack of code holding the event loop longer than the threshold.
+    debug_slow_steps: bool = os.getenv("DEBUG_SLOW_STEPS") is not None
+    slow_step_threshold: float = 0.25
+
+
 class Color:
     """Colors used in various embeds."""
 
@@ -105,21 +166,70 @@ class Emoji:
     trashcan: str = "🗑️"
 
 
+def memory_profile_options(
+    profile: Literal["minimal", "interactions", "full"],
+) -> dict[str, Any]:
+    """Return the intents and caching options of a memory profile, to be passed to `Bot`.
+
+    - `minimal` only receives guilds and caches no members or messages.
+    - `interactions` receives the non-privileged events and only caches members in voice.
+    - `full` receives everything, caches every member and chunks guilds at startup.
+    """
+    if profile == "minimal":
+        return {
+            "intents": disnake.Intents(guilds=True),
+            "member_cache_flags": disnake.MemberCacheFlags.none(),
+            "max_messages": None,
+            "chunk_guilds_at_startup": False,
+        }
+
+    if profile == "interactions":
+        intents = disnake.Intents.default()
+        intents.typing = False
+        return {
+            "intents": intents,
+            "member_cache_flags": disnake.MemberCacheFlags(voice=True, joined=False),
+            "max_messages": None,
+            "chunk_guilds_at_startup": False,
+        }
+
+    if profile == "full":
+        return {
+            "intents": disnake.Intents.all(),
+            "member_cache_flags": disnake.MemberCacheFlags.all(),
+            "max_messages": 1000,
+            "chunk_guilds_at_startup": True,
+        }
+
+    msg = f"Unknown memory profile: {profile}"
+    raise ValueError(msg)
+
+
 def generate_table(data: Mapping[str, Iterable[Any]] | Iterable[Iterable[Any]]) -> str:
     """Generate a rounded table with tabulate."""
     return tabulate(data, tablefmt="rounded_outline")
 
 
-def generate_startup_table(bot_name: str, bot_id: int) -> str:
-    """Generate the table for startup."""
+def generate_startup_table(
+    bot_name: str,
+    bot_id: int,
+    phases: Mapping[str, float] | None = None,
+) -> str:
+    """Generate the table for startup, with the duration of each startup phase if given."""
     now = dt.datetime.now(tz=dt.timezone.utc)
 
-    return generate_table(
-        data=[
-            ["Started", now.strftime("%m/%d/%Y - %H:%M:%S")],
-            ["System Version", s.version],
-            ["Disnake Version", disnake_version],
-            ["Bot Version", bot_version],
-            ["Connected as", f"{bot_name} ({bot_id})"],
-        ],
-    )
+    data: list[list[str]] = [
+        ["Started", now.strftime("%m/%d/%Y - %H:%M:%S")],
+        ["System Version", s.version],
+        ["Disnake Version", disnake_version],
+        ["Bot Version", bot_version],
+        ["Connected as", f"{bot_name} ({bot_id})"],
+    ]
+
+    if phases:
+        data.extend(
+            [f"Startup: {name}", f"{seconds * 1000:.0f} ms"] for name, seconds in phases.items()
+        )
+        data.append(["Startup: Total", f"{sum(phases.values()) * 1000:.0f} ms"])
+
+    return generate_table(data=data)
@@ -1,10 +1,15 @@
+from urllib.parse import urlsplit
+
 from src import log
 
 logger = log.get_logger(__name__)
 
 __all__ = (
     "BaseBotError",
+    "CircuitOpenError",
     "GeneralHTTPError",
+    "RateLimitedError",
+    "ResponseTooLargeError",
 )
 
 
@@ -16,8 +21,42 @@ class GeneralHTTPError(Exception):
     """General HTTP error."""
 
     def __init__(self, method: str, url: str, status: int) -> None:
-        msg = f"{method} request to {url} failed - {status}"
-        logger.error(msg)
+        # repeated failures of a host with the same status are collapsed by the log dedup.
+        logger.error(
+            "%s request to %s failed - %s",
+            method,
+            url,
+            status,
+            extra={"dedup_key": (urlsplit(url).hostname, status)},
+        )
 
         super().__init__(f"Request to {url} failed - {status}")
         self.status = status
+
+
+class ResponseTooLargeError(BaseBotError):
+    """A streamed response body exceeded the allowed size."""
+
+    def __init__(self, url: str, max_body_size: int) -> None:
+        super().__init__(f"Response from {url} exceeded {max_body_size} bytes")
+        self.url = url
+        self.max_body_size = max_body_size
+
+
+class CircuitOpenError(BaseBotError):
+    """Requests to a host are rejected because its circuit breaker is open."""
+
+    def __init__(self, host: str, retry_after: float) -> None:
+        super().__init__(f"Circuit for {host} is open, retry in {retry_after:.1f}s")
+        self.host = host
+        self.retry_after = retry_after
+
+
+class RateLimitedError(BaseBotError):
+    """A host asked to retry a request later than the client is willing to wait."""
+
+    def __init__(self, method: str, url: str, retry_after: float) -> None:
+        super().__init__(f"{method} request to {url} is rate limited for {retry_after:.1f}s")
+        self.method = method
+        self.url = url
+        self.retry_after = retry_after
@@ -6,32 +6,25 @@ from disnake.ext import plugins as p
 from src import log
 from src.bot import Bot
 from src.components import trash
+from src.components.router import router
 
 logger = log.get_logger(__name__)
 
 plugin = p.Plugin[Bot]()
 
 
-@plugin.listener("on_button_click")
-async def handle_trash_button(inter: disnake.MessageInteraction) -> None:
+@router.route(trash.legacy_trash_codec)
+@router.route(trash.trash_codec)
+async def handle_trash_button(inter: disnake.MessageInteraction, state: trash.TrashState) -> None:
     """Handle message deletion when trash button clicked.
 
     While most of our responses are going to be interaction responses, this button listener
     will allow the use of appending the trash button to non interaction response messages
     like dm messages or regular channel messages sent for other reasons.
     """
-    if not inter.component.custom_id or not inter.component.custom_id.startswith(
-        trash.TRASH_BUTTON_CUSTOM_ID,
-    ):
-        return
-
-    custom_id = inter.component.custom_id.removeprefix(trash.TRASH_BUTTON_CUSTOM_ID)
-    perms, user_id, *_ = custom_id.split(":")
-    perms, user_id = int(perms), int(user_id)
-
     # check if user is the allowed user OR check if the user has required permissions
     # missing permissions message sent here if user cannot delete.
-    if not await has_permission_to_delete(inter, user_id, perms):
+    if not await has_permission_to_delete(inter, state.user_id, state.perms):
         await inter.response.send_message(
             "Sorry. You are not permitted to delete this message.",
             ephemeral=True,
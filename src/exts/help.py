@@ -1,15 +1,21 @@
 from __future__ import annotations
 
+import asyncio
+import collections
 import typing as t
 
 import disnake
 from disnake.ext import plugins as p
 from helply import utils
 
-from src import log
+from src import constants, log
 from src.bot import Bot
-from src.components import trash
+from src.components import paginator, trash
+from src.components.router import router
 from src.constants import Color
+from src.util.command_index import CommandIndex, rank
+from src.util.page_cache import fingerprint
+from src.util.respond import Responder
 
 logger = log.get_logger(__name__)
 
@@ -17,6 +23,18 @@ plugin = p.Plugin[Bot]()
 
 NO_COMMAND = "No commands available."
 
+# the command names each (guild, permissions, locale) can see, for autocomplete.
+command_index = CommandIndex()
+
+# how many overviews were sent per user locale, the most requested ones are warmed.
+# Discord clients default to en-US, so it is warmed before anything was requested.
+requested_locales: collections.Counter[disnake.Locale] = collections.Counter(
+    {disnake.Locale.en_US: 0},
+)
+WARMED_LOCALES = 3
+
+_warm_task: asyncio.Task[None] | None = None
+
 
 @plugin.slash_command(name="help")
 async def help_command(inter: disnake.CommandInteraction, command: str | None = None) -> None:
@@ -26,35 +44,39 @@ async def help_command(inter: disnake.CommandInteraction, command: str | None =
     ----------
     command: Select a command to view its details.
     """
-    await inter.response.defer()
-
-    if command:
-        if command == NO_COMMAND:
-            await inter.delete_original_response()
-            await inter.followup.send(NO_COMMAND, ephemeral=True)
+    async with Responder(inter) as responder:
+        if command:
+            await send_command_detail(inter, responder, command)
             return
 
-        command_ = plugin.bot.helply.get_command_named(command, locale=inter.locale)
-        if not command_:
-            await inter.delete_original_response()
-            await inter.followup.send(
-                f"Unable to find a command you're permitted to use with the name **{command}**.",
-                ephemeral=True,
-            )
+        if inter.guild:
+            inter = t.cast(disnake.GuildCommandInteraction, inter)
+            await handle_guild_context(inter, responder)
             return
-        embed = utils.command_detail_embed(command_, color=Color.BLURPLE)
-        await inter.edit_original_response(
-            embed=embed,
-            components=[trash.TrashButton(inter.author.id)],
-        )
+
+        await handle_dm_context(inter, responder)
+
+
+async def send_command_detail(
+    inter: disnake.CommandInteraction,
+    responder: Responder,
+    command: str,
+) -> None:
+    """Respond with the details of a command, or privately tell the user it wasn't found."""
+    if command == NO_COMMAND:
+        await responder.send(NO_COMMAND, ephemeral=True)
         return
 
-    if inter.guild:
-        inter = t.cast(disnake.GuildCommandInteraction, inter)
-        await handle_guild_context(inter)
+    command_ = plugin.bot.helply.get_command_named(command, locale=inter.locale)
+    if not command_:
+        await responder.send(
+            f"Unable to find a command you're permitted to use with the name **{command}**.",
+            ephemeral=True,
+        )
         return
 
-    await handle_dm_context(inter)
+    embed = utils.command_detail_embed(command_, color=Color.BLURPLE)
+    await responder.send(embed=embed, components=[trash.TrashButton(inter.author.id)])
 
 
 @help_command.autocomplete("command")  # type: ignore[reportUnknownMemberType]
@@ -62,27 +84,110 @@ async def help_command_autocomplete(inter: disnake.CommandInteraction, string: s
     """Autocomplete handler for help command."""
     if inter.guild:
         inter = t.cast(disnake.GuildCommandInteraction, inter)
-        commands = plugin.bot.helply.get_guild_commands(
+        key = (inter.guild.id, inter.author.guild_permissions.value, str(inter.locale))
+    else:
+        key = (None, 0, str(inter.locale))
+
+    def load() -> list[str]:
+        return _command_names(inter)
+
+    names = command_index.names(key, load)
+    if not names:
+        # the author can use no command here, picking this is answered by `send_command_detail`.
+        return [NO_COMMAND]
+    return rank(names, string)
+
+
+def _command_names(inter: disnake.CommandInteraction) -> list[str]:
+    """List the names of the commands the author can use where the interaction happened."""
+    return [c.name for c in _commands_for(inter, inter.locale)]
+
+
+def _commands_for(inter: disnake.Interaction, locale: disnake.Locale) -> list[t.Any]:
+    """List the commands the author can use where the interaction happened."""
+    if inter.guild and isinstance(inter.author, disnake.Member):
+        return plugin.bot.helply.get_guild_commands(
             inter.guild.id,
             permissions=inter.author.guild_permissions,
-            locale=inter.locale,
+            locale=locale,
         )
-    else:
-        commands = plugin.bot.helply.get_dm_only_commands(locale=inter.locale)
+    return plugin.bot.helply.get_dm_only_commands(locale=locale)
+
+
+@plugin.listener("on_command_tree_changed")
+async def clear_help_caches() -> None:
+    """Forget the cached command lists and pages once commands are synced or reloaded."""
+    command_index.clear()
+    plugin.bot.help_pages.clear()
+    if plugin.bot.is_ready():
+        await warm_help_pages()
+
+
+async def warm_help_pages_when_ready() -> None:
+    """Render the overview pages ahead of time, before members start using /help.
+
+    Started when the extension is loaded instead of listening to `on_ready`, so a lazily
+    loaded extension isn't imported at startup just to warm its pages.
+    """
+    await plugin.bot.wait_until_ready()
+    await warm_help_pages()
 
-    if not commands:
-        return [NO_COMMAND]
 
-    return [c.name for c in commands if string.casefold() in c.name.casefold()]
+async def warm_help_pages() -> None:
+    """Render the overview pages seen by the default role of every guild.
+
+    The pages are looked up by the locale of the user, so they are rendered in the most
+    requested user locales rather than the preferred locale of each guild.
+    """
+    locales = [locale for locale, _ in requested_locales.most_common(WARMED_LOCALES)]
+
+    for i, guild in enumerate(plugin.bot.guilds, 1):
+        for locale in locales:
+            commands = plugin.bot.helply.get_guild_commands(
+                guild.id,
+                permissions=guild.default_role.permissions,
+                locale=locale,
+            )
+            if commands:
+                overview_pages(commands, locale)
+
+        if i % 100 == 0:
+            # don't hold the loop on bots in thousands of guilds.
+            await asyncio.sleep(0)
+
+    cache = plugin.bot.help_pages
+    logger.info(f"Warmed {len(cache)} /help page set(s) for {len(plugin.bot.guilds)} guild(s)")
+
+
+def overview_pages(commands: t.Sequence[t.Any], locale: disnake.Locale) -> list[disnake.Embed]:
+    """Return the overview pages of some commands, rendered once per command set and locale.
+
+    The pages are shared, copy them before modifying them.
+    """
+    key = (command_fingerprint(commands), str(locale))
+    return plugin.bot.help_pages.get_or_build(
+        key,
+        lambda: utils.commands_overview_embeds(
+            commands,
+            max_field_chars=700,
+            max_fields=1,
+            color=Color.BLURPLE,
+        ),
+    )
 
 
-async def handle_guild_context(inter: disnake.GuildCommandInteraction) -> None:
+async def handle_guild_context(
+    inter: disnake.GuildCommandInteraction,
+    responder: Responder,
+) -> None:
     """Handle helply when called from a guild.
 
     Parameters
     ----------
     inter : disnake.GuildCommandInteraction |
         The interaction corrosponding to the help command.
+    responder : Responder
+        Sends the response to the interaction.
     """
     commands = plugin.bot.helply.get_guild_commands(
         inter.guild.id,
@@ -90,63 +195,130 @@ async def handle_guild_context(inter: disnake.GuildCommandInteraction) -> None:
         permissions=inter.author.guild_permissions,
     )
     if not commands:
-        await inter.delete_original_response()
-        await inter.followup.send(
-            "Unable to find any commands you're permitted to use.",
-            ephemeral=True,
-        )
+        await responder.send("Unable to find any commands you're permitted to use.", ephemeral=True)
         return
 
-    embeds = utils.commands_overview_embeds(
-        commands,
-        max_field_chars=700,
-        max_fields=1,
-        color=Color.BLURPLE,
-    )
-    view = utils.Paginator(embeds=embeds) if len(embeds) > 1 else disnake.utils.MISSING
-    trash_button = trash.TrashButton(inter.author.id)
-    if view:
-        view.add_item(trash_button)  # type: ignore[reportUnknownMemberType]
-        components = disnake.utils.MISSING
-    else:
-        components = [trash_button]
-
-    await inter.edit_original_response(embed=embeds[0], view=view, components=components)
-    view.message = await inter.original_response()
+    await send_overview(inter, responder, commands)
 
 
-async def handle_dm_context(inter: disnake.CommandInteraction) -> None:
+async def handle_dm_context(inter: disnake.CommandInteraction, responder: Responder) -> None:
     """Handle helply when called from direct message.
 
     Parameters
     ----------
     inter : disnake.GuildCommandInteraction |
         The interaction corrosponding to the help command.
+    responder : Responder
+        Sends the response to the interaction.
     """
     commands = plugin.bot.helply.get_dm_only_commands(locale=inter.locale)
 
     if not commands:
-        await inter.edit_original_response(
+        await responder.send(
             "Unable to find any commands you're permitted to use outside of a guild.",
         )
         return
 
-    embeds = utils.commands_overview_embeds(
-        commands,
-        max_field_chars=700,
-        max_fields=1,
-        color=Color.BLURPLE,
-    )
-    view = utils.Paginator(embeds=embeds) if len(embeds) > 1 else disnake.utils.MISSING
+    await send_overview(inter, responder, commands)
+
+
+def command_fingerprint(commands: t.Iterable[t.Any]) -> str:
+    """Return the fingerprint identifying a set of commands, see `page_cache.fingerprint`."""
+    return fingerprint(c.name for c in commands)
+
+
+async def send_overview(
+    inter: disnake.CommandInteraction,
+    responder: Responder,
+    commands: t.Sequence[t.Any],
+) -> None:
+    """Respond with the first overview page of some commands, and a way to turn the pages."""
+    requested_locales[inter.locale] += 1
+    embeds = overview_pages(commands, inter.locale)
     trash_button = trash.TrashButton(inter.author.id)
+
+    if len(embeds) > 1 and constants.Client.stateless_help:
+        buttons = paginator.page_buttons(
+            0,
+            len(embeds),
+            command_fingerprint(commands),
+            str(inter.locale),
+            inter.author.id,
+        )
+        await responder.send(embed=embeds[0], components=[*buttons, trash_button])
+        return
+
+    view = (
+        utils.Paginator(embeds=[embed.copy() for embed in embeds])
+        if len(embeds) > 1
+        else disnake.utils.MISSING
+    )
     if view:
         view.add_item(trash_button)  # type: ignore[reportUnknownMemberType]
         components = disnake.utils.MISSING
     else:
         components = [trash_button]
 
-    await inter.edit_original_response(embed=embeds[0], view=view, components=components)
-    view.message = await inter.original_response()
+    await responder.send(embed=embeds[0], view=view, components=components)
+    if view:
+        view.message = await inter.original_response()
+
+
+@router.route(paginator.page_codec)
+async def handle_page_button(inter: disnake.MessageInteraction, state: paginator.PageState) -> None:
+    """Turn the page of a stateless /help overview.
+
+    The pages are looked up in the shared page cache by the fingerprint and locale stored in
+    the custom ID. When they aren't cached, e.g. after a restart or once the commands
+    changed, the current commands of the user are rendered instead.
+    """
+    if inter.author.id != state.user_id:
+        await inter.response.send_message(
+            "Only the person who used /help can turn its pages.",
+            ephemeral=True,
+        )
+        return
+
+    # the pages the message was rendered from, unless the commands changed since then.
+    fingerprint_, locale_ = state.fingerprint, state.locale
+    embeds = plugin.bot.help_pages.get((fingerprint_, locale_))
+    if embeds is None:
+        try:
+            locale = disnake.Locale(state.locale)
+        except ValueError:
+            locale = inter.locale
+
+        commands = _commands_for(inter, locale)
+        if not commands:
+            await inter.response.send_message(
+                "Unable to find any commands you're permitted to use.",
+                ephemeral=True,
+            )
+            return
+
+        embeds = overview_pages(commands, locale)
+        fingerprint_, locale_ = command_fingerprint(commands), str(locale)
+
+    page = min(state.page, len(embeds) - 1)
+    buttons = paginator.page_buttons(page, len(embeds), fingerprint_, locale_, state.user_id)
+    await inter.response.edit_message(
+        embed=embeds[page],
+        components=[*buttons, trash.TrashButton(state.user_id)],
+    )
+
+
+_setup, _teardown = plugin.create_extension_handlers()
+
+
+def setup(bot: Bot) -> None:
+    """Load the extension, and warm the overview pages once the bot is ready."""
+    global _warm_task  # noqa: PLW0603
+    _setup(bot)
+    _warm_task = asyncio.create_task(warm_help_pages_when_ready())
 
 
-setup, teardown = plugin.create_extension_handlers()
+def teardown(bot: Bot) -> None:
+    """Unload the extension, stopping the warming if it hasn't finished."""
+    if _warm_task is not None:
+        _warm_task.cancel()
+    _teardown(bot)
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import datetime as dt
+import time
+import typing as t
+
+# disnake evaluates the annotations of command callbacks, so it is needed at runtime.
+import disnake  # noqa: TCH002
+from disnake.ext import commands
+from disnake.ext import plugins as p
+
+from src import constants
+from src.bot import Bot
+
+plugin = p.Plugin[Bot]()
+
+
+def _worker_row(cluster_id: int, health: dict[str, t.Any]) -> list[str]:
+    """Summarize the latest health report of a cluster worker."""
+    shard_ids: list[int] = health["shard_ids"]
+    latencies: list[float] = list(health["latencies"].values())
+    latency = f"{max(latencies) * 1000:.0f} ms" if latencies else "no shards"
+
+    return [
+        f"Cluster {cluster_id} (shards {shard_ids[0]}-{shard_ids[-1]})",
+        f"{'ready' if health['ready'] else 'starting'}, {health['guilds']:,} guilds, "
+        f"{latency}, {health['rss'] / 1024 / 1024:.1f} MiB, "
+        f"{time.time() - health['reported_at']:.0f}s ago",
+    ]
+
+
+@plugin.slash_command(name="stats", dm_permission=False)
+@commands.is_owner()
+async def stats_command(inter: disnake.CommandInteraction) -> None:
+    """View the bot's runtime health [USAGE: /stats]."""
+    bot = plugin.bot
+    uptime = dt.datetime.now(tz=dt.timezone.utc) - bot.start_time
+
+    data: list[list[str]] = [
+        ["Uptime", str(uptime).split(".")[0]],
+        ["Guilds", f"{bot.total_guild_count:,}"],
+        ["Shards", f"{len(bot.shards)} / {bot.shard_count or 1}"],
+        ["Gateway latency", f"{bot.latency * 1000:.0f} ms"],
+        [
+            "/help page cache",
+            f"{bot.help_pages.hit_rate:.0%} hits, {len(bot.help_pages)} page set(s)",
+        ],
+    ]
+
+    if bot.lazy_extensions is not None:
+        lazy = bot.lazy_extensions.stats()
+        data.append(
+            [
+                "Lazy extensions",
+                f"{lazy['loaded']} loaded in {lazy['deferred_seconds'] * 1000:.0f} ms "
+                f"(+{lazy['deferred_rss'] / 1024 / 1024:.1f} MiB), {lazy['pending']} pending",
+            ],
+        )
+
+    if bot.cluster is not None:
+        data.extend(
+            _worker_row(cluster_id, health)
+            for cluster_id, health in sorted(bot.cluster.workers.items())
+        )
+
+    if bot.health is not None:
+        sample = bot.health.latest or bot.health.sample()
+        data.extend(
+            [
+                ["Loop lag (max)", f"{sample['loop_lag'] * 1000:.1f} ms"],
+                ["RSS", f"{sample['rss'] / 1024 / 1024:.1f} MiB"],
+                ["CPU", f"{sample['cpu_percent']:.1f}%"],
+                ["Threads", f"{sample['threads']:.0f}"],
+                ["Open FDs", f"{sample['open_fds']:.0f}"],
+                [
+                    "GC collections",
+                    f"{sample['gc_gen0']:.0f} / {sample['gc_gen1']:.0f} / {sample['gc_gen2']:.0f}",
+                ],
+                [
+                    "GC pause",
+                    f"{sample['gc_pause'] * 1000:.1f} ms (max {sample['gc_max_pause'] * 1000:.1f})",
+                ],
+                ["Slow loop steps", f"{sample['slow_steps']:.0f}"],
+            ],
+        )
+
+    await inter.response.send_message(
+        f"```\n{constants.generate_table(data)}\n```",
+        ephemeral=True,
+    )
+
+
+@stats_command.error  # type: ignore[reportUnknownMemberType]
+async def stats_command_error(inter: disnake.CommandInteraction, error: Exception) -> None:
+    """Tell non-owners they can't use the command."""
+    if isinstance(error, commands.NotOwner):
+        await inter.response.send_message("Only the owners can view the stats.", ephemeral=True)
+        return
+    raise error
+
+
+setup, teardown = plugin.create_extension_handlers()
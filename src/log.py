@@ -1,9 +1,254 @@
+from __future__ import annotations
+
+import atexit
+import copy
+import gzip
+import json
 import logging
 import logging.handlers
+import multiprocessing
+import queue
+import shutil
+import threading
+import time
+import typing as t
 from pathlib import Path
 
 import coloredlogs  # type: ignore[reportMissingTypeStubs]
 
+# run every handler on a background thread, so logging never does disk I/O on the event loop.
+QUEUE_LOGGING: bool = True
+QUEUE_SIZE: int = 10_000
+# what to do when the background thread can't keep up and the queue is full.
+OVERFLOW_POLICY: t.Literal["block", "drop_new", "drop_oldest"] = "drop_oldest"
+# write the log file as JSON lines instead of plain text.
+JSON_LOGS: bool = False
+# gzip rotated log files on a background thread.
+COMPRESS_ROTATED: bool = True
+# collapse identical warnings and errors logged within the window into a single summary.
+DEDUP_LOGGING: bool = True
+DEDUP_WINDOW: float = 60.0
+
+
+class JSONFormatter(logging.Formatter):
+    """Format records as single-line JSON objects."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Format a record as JSON."""
+        data: dict[str, t.Any] = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "message": record.getMessage(),
+        }
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data["exception"] = record.exc_text
+        if record.stack_info:
+            data["stack"] = self.formatStack(record.stack_info)
+
+        return json.dumps(data, ensure_ascii=False)
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """A `QueueHandler` with a bounded queue and an overflow policy.
+
+    Parameters
+    ----------
+    maxsize : int
+        The maximum amount of records waiting for the background thread.
+    overflow : t.Literal["block", "drop_new", "drop_oldest"]
+        Whether to wait for room, drop the new record or drop the oldest queued record
+        when the queue is full.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        overflow: t.Literal["block", "drop_new", "drop_oldest"] = "drop_oldest",
+    ) -> None:
+        super().__init__(queue.Queue(maxsize))
+        self.overflow = overflow
+        self.dropped: int = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Merge the arguments and render the traceback before handing the record over.
+
+        Unlike the default, the exception is kept in `exc_text` instead of being folded
+        into the message, so the sinks can format it their own way.
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+
+        if record.exc_info:
+            record.exc_text = _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Put a record on the queue, applying the overflow policy when it is full."""
+        if self.overflow == "block":
+            self.queue.put(record)
+            return
+
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            if self.overflow == "drop_oldest":
+                try:
+                    self.queue.get_nowait()
+                    self.queue.put_nowait(record)
+                except (queue.Empty, queue.Full):
+                    pass
+
+
+class DedupFilter(logging.Filter):
+    """Let only the first of similar records within a time window through.
+
+    Records are similar when they share their logger, level and message template, so
+    `%`-style calls group regardless of their arguments. Pass `extra={"dedup_key": ...}`
+    to keep records apart by e.g. their host or status. Once the window of a record has
+    passed, a "suppressed N similar" summary is logged for the records that were dropped.
+    The same instance can be attached to several handlers, every handler gets the same
+    verdict for a record.
+
+    Parameters
+    ----------
+    window : float
+        How long, in seconds, similar records are collapsed.
+    level : int
+        Records below this level are never suppressed.
+    """
+
+    def __init__(self, window: float = 60.0, level: int = logging.WARNING) -> None:
+        super().__init__()
+        self.window = window
+        self.level = level
+        self.suppressed: int = 0
+
+        # key -> [start of the window, records suppressed within it, first message]
+        self._seen: dict[tuple[t.Any, ...], list[t.Any]] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Return whether the record should be emitted."""
+        verdict: bool | None = getattr(record, "_dedup_verdict", None)
+        if verdict is not None:
+            return verdict
+
+        if record.levelno < self.level:
+            return True
+
+        key = (record.name, record.levelno, record.msg, getattr(record, "dedup_key", None))
+        now = time.monotonic()
+        summary: tuple[tuple[t.Any, ...], int, str] | None = None
+        with self._lock:
+            state = self._seen.get(key)
+            if state is not None and now - state[0] < self.window:
+                state[1] += 1
+                self.suppressed += 1
+                verdict = False
+            else:
+                if state is not None and state[1]:
+                    summary = (key, state[1], state[2])
+                self._seen[key] = [now, 0, record.getMessage()]
+                verdict = True
+
+        record._dedup_verdict = verdict  # type: ignore[reportAttributeAccessIssue]  # noqa: SLF001
+        if summary is not None:
+            self._summarize(*summary)
+        return verdict
+
+    def start(self) -> None:
+        """Log the summaries of expired windows from a background thread."""
+        if self._thread is not None:
+            return
+
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="log-dedup", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread, see `flush` for the windows still open."""
+        if self._thread is None:
+            return
+
+        self._stopped.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.window):
+            self.sweep()
+
+    def sweep(self) -> None:
+        """Forget expired windows, logging a summary for the ones that suppressed records."""
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, (start, *_) in self._seen.items() if now - start >= self.window]
+            summaries = [(key, *self._seen.pop(key)[1:]) for key in expired]
+
+        for key, count, message in summaries:
+            if count:
+                self._summarize(key, count, message)
+
+    def flush(self) -> None:
+        """Log a summary for every window that suppressed records, e.g. on shutdown."""
+        with self._lock:
+            summaries = [(key, count, message) for key, (_, count, message) in self._seen.items()]
+            self._seen.clear()
+
+        for key, count, message in summaries:
+            if count:
+                self._summarize(key, count, message)
+
+    def _summarize(self, key: tuple[t.Any, ...], count: int, message: str) -> None:
+        name, level, *_ = key
+        summary = logging.getLogger(name).makeRecord(
+            name,
+            level,
+            "(dedup)",
+            0,
+            f"Suppressed {count} similar message(s) in the last {self.window:g}s: {message}",
+            None,
+            None,
+        )
+        summary._dedup_verdict = True  # type: ignore[reportAttributeAccessIssue]  # noqa: SLF001
+        logging.getLogger(name).handle(summary)
+
+
+_exception_formatter = logging.Formatter()
+_compressions: list[threading.Thread] = []
+
+
+def _compress(source: str, dest: str) -> None:
+    with Path(source).open("rb") as src, gzip.open(dest, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    Path(source).unlink()
+
+
+def _gzip_namer(name: str) -> str:
+    return f"{name}.gz"
+
+
+def _gzip_rotator(source: str, dest: str) -> None:
+    # move the file out of the way right away, the handler reopens `source` after this.
+    pending = f"{dest}.pending"
+    Path(source).replace(pending)
+
+    thread = threading.Thread(target=_compress, args=(pending, dest), name="log-gzip")
+    thread.start()
+    _compressions.append(thread)
+
+
 # setup logging format
 format_string = "%(asctime)s | %(module)s | %(levelname)s | %(message)s"
 formatter = logging.Formatter(format_string)
@@ -18,7 +263,11 @@ stdout_handler.setFormatter(formatter)
 logger.addHandler(stdout_handler)
 
 # setup logging file
-log_file = Path("src/logs/log.log")
+# every worker process of a cluster rotates its own file, named after the process.
+process_name = multiprocessing.current_process().name
+log_file = Path(
+    "src/logs/log.log" if process_name == "MainProcess" else f"src/logs/{process_name}.log",
+)
 log_file.parent.mkdir(exist_ok=True)
 
 # setup logger file handler
@@ -33,7 +282,10 @@ file_handler = logging.handlers.TimedRotatingFileHandler(
 )
 
 file_handler.setLevel(logging.INFO)
-file_handler.setFormatter(formatter)
+file_handler.setFormatter(JSONFormatter() if JSON_LOGS else formatter)
+if COMPRESS_ROTATED:
+    file_handler.namer = _gzip_namer
+    file_handler.rotator = _gzip_rotator
 logger.addHandler(file_handler)
 
 coloredlogs.DEFAULT_LEVEL_STYLES = {
@@ -52,10 +304,68 @@ coloredlogs.install(  # type: ignore[unknownMemberTypes]
 # silence disnake's annoying info logger
 logging.getLogger("disnake").setLevel(logging.WARNING)
 
+dedup_filter: DedupFilter | None = None
+if DEDUP_LOGGING:
+    dedup_filter = DedupFilter(DEDUP_WINDOW)
+    for sink in logger.handlers:
+        sink.addFilter(dedup_filter)
+    dedup_filter.start()
+
+sinks: list[logging.Handler] = []
+queue_handler: BoundedQueueHandler | None = None
+listener: logging.handlers.QueueListener | None = None
+
+if QUEUE_LOGGING:
+    # move every sink behind a queue, the root logger only enqueues records.
+    sinks = logger.handlers[:]
+    for sink in sinks:
+        logger.removeHandler(sink)
+
+    queue_handler = BoundedQueueHandler(QUEUE_SIZE, OVERFLOW_POLICY)
+    if dedup_filter is not None:
+        # drop duplicates before they are copied onto the queue.
+        queue_handler.addFilter(dedup_filter)
+    listener = logging.handlers.QueueListener(
+        queue_handler.queue,
+        *sinks,
+        respect_handler_level=True,
+    )
+    listener.start()
+    logger.addHandler(queue_handler)
+
 logger = logging.getLogger()
 logger.info("Logging has been initialized")
 
 
+def shutdown() -> None:
+    """Flush queued records, stop the background thread and finish pending compressions."""
+    global listener  # noqa: PLW0603
+
+    if dedup_filter is not None:
+        dedup_filter.stop()
+        dedup_filter.flush()
+
+    if listener is not None:
+        if queue_handler is not None and queue_handler.dropped:
+            logger.warning(f"Dropped {queue_handler.dropped} log records, the queue was full")
+
+        listener.stop()
+        listener = None
+
+        # records logged from now on are handled right away.
+        if queue_handler is not None:
+            logger.removeHandler(queue_handler)
+        for sink in sinks:
+            logger.addHandler(sink)
+
+    for thread in _compressions:
+        thread.join()
+    _compressions.clear()
+
+
+atexit.register(shutdown)
+
+
 def get_logger(name: str) -> logging.Logger:
     """Return a logger."""
     return logging.getLogger(name)
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import enum
+import time
+
+from src import log
+
+logger = log.get_logger(__name__)
+
+__all__ = (
+    "CircuitBreaker",
+    "CircuitBreakers",
+    "CircuitState",
+)
+
+
+class CircuitState(enum.Enum):
+    """The states of a circuit breaker."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+
+class CircuitBreaker:
+    """Stop sending requests to an upstream that keeps failing.
+
+    The breaker opens after `failure_threshold` consecutive failures. While open, calls
+    are rejected until `recovery_timeout` has passed, after which it becomes half-open
+    and lets `half_open_max_calls` trial calls through. A successful trial closes it
+    again, a failed one reopens it.
+
+    Parameters
+    ----------
+    name : str
+        The name of the breaker, usually the upstream host.
+    failure_threshold : int
+        The amount of consecutive failures that opens the breaker.
+    recovery_timeout : float
+        How long, in seconds, the breaker stays open before allowing trial calls.
+    half_open_max_calls : int
+        The amount of trial calls allowed while half-open.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self.failures: int = 0
+        self.times_opened: int = 0
+
+        self._state = CircuitState.CLOSED
+        self._opened_at: float = 0.0
+        self._trial_calls: int = 0
+
+    @property
+    def state(self) -> CircuitState:
+        """Return the current state, moving from open to half-open once cooled down."""
+        if self._state is CircuitState.OPEN and self.retry_after <= 0:
+            self._transition(CircuitState.HALF_OPEN)
+        return self._state
+
+    @property
+    def retry_after(self) -> float:
+        """Return how long, in seconds, the breaker stays open. 0 when it isn't open."""
+        if self._state is not CircuitState.OPEN:
+            return 0.0
+        return max(self._opened_at + self.recovery_timeout - time.monotonic(), 0.0)
+
+    def _transition(self, state: CircuitState) -> None:
+        previous, self._state = self._state, state
+        self._trial_calls = 0
+
+        if state is CircuitState.OPEN:
+            self._opened_at = time.monotonic()
+            self.times_opened += 1
+            logger.warning(
+                f"Circuit for {self.name} opened after {self.failures} failures "
+                f"({previous.value} -> {state.value}), "
+                f"failing fast for {self.recovery_timeout}s",
+            )
+        elif state is CircuitState.CLOSED:
+            self.failures = 0
+            logger.info(f"Circuit for {self.name} closed ({previous.value} -> {state.value})")
+        else:
+            logger.info(f"Circuit for {self.name} is {state.value}, allowing trial calls")
+
+    def allow(self) -> bool:
+        """Return whether a call may go through, reserving a trial call when half-open."""
+        state = self.state
+        if state is CircuitState.CLOSED:
+            return True
+
+        if state is CircuitState.HALF_OPEN and self._trial_calls < self.half_open_max_calls:
+            self._trial_calls += 1
+            return True
+
+        return False
+
+    def release(self) -> None:
+        """Give back a trial call that ended without an outcome, e.g. when cancelled."""
+        if self._state is CircuitState.HALF_OPEN and self._trial_calls:
+            self._trial_calls -= 1
+
+    def record_success(self) -> None:
+        """Record a successful call."""
+        if self._state is not CircuitState.CLOSED:
+            self._transition(CircuitState.CLOSED)
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        """Record a failed call, opening the breaker if needed."""
+        self.failures += 1
+        if self._state is CircuitState.HALF_OPEN or (
+            self._state is CircuitState.CLOSED and self.failures >= self.failure_threshold
+        ):
+            self._transition(CircuitState.OPEN)
+
+    def settle(self, *, success: bool | None) -> None:
+        """Record the outcome of an allowed call, or release its trial call without one.
+
+        Call it in a `finally` block, so a call failing in an unexpected way never keeps
+        its trial call reserved, which would leave the breaker half-open for good.
+        """
+        if success is None:
+            self.release()
+        elif success:
+            self.record_success()
+        else:
+            self.record_failure()
+
+    def snapshot(self) -> dict[str, str | int | float]:
+        """Return the state of the breaker, for monitoring."""
+        return {
+            "state": self.state.value,
+            "failures": self.failures,
+            "times_opened": self.times_opened,
+            "retry_after": round(self.retry_after, 2),
+        }
+
+
+class CircuitBreakers:
+    """Hand out a `CircuitBreaker` per upstream host.
+
+    Parameters
+    ----------
+    failure_threshold : int
+        The amount of consecutive failures that opens a breaker.
+    recovery_timeout : float
+        How long, in seconds, a breaker stays open before allowing trial calls.
+    half_open_max_calls : int
+        The amount of trial calls allowed while half-open.
+    """
+
+    def __init__(
+        self,
+        *,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    def get(self, host: str) -> CircuitBreaker:
+        """Return the breaker for a host, creating it if necessary."""
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            breaker = self._breakers[host] = CircuitBreaker(
+                host,
+                failure_threshold=self.failure_threshold,
+                recovery_timeout=self.recovery_timeout,
+                half_open_max_calls=self.half_open_max_calls,
+            )
+        return breaker
+
+    def snapshot(self) -> dict[str, dict[str, str | int | float]]:
+        """Return the state of every breaker, keyed by host."""
+        return {host: breaker.snapshot() for host, breaker in self._breakers.items()}
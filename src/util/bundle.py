@@ -0,0 +1,279 @@
+"""Compile `src/lang/` into a single validated bundle file.
+
+Build it with `python -m src.util.bundle src/lang/ src/lang.bundle`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import mmap
+import string
+import struct
+import sys
+import typing as t
+from pathlib import Path
+
+from disnake import utils
+
+from src import log
+
+logger = log.get_logger(__name__)
+
+__all__ = (
+    "BUNDLE_VERSION",
+    "BundleError",
+    "build_bundle",
+    "read_bundle",
+    "read_language_dir",
+    "source_stamp",
+    "validate",
+)
+
+Strings = dict[str, dict[str, str]]
+"""Localized strings, as `{locale: {key: text}}`."""
+
+BUNDLE_MAGIC = b"BTLB"
+BUNDLE_VERSION = 3
+DEFAULT_LOCALE = "en-US"
+
+# magic, format version, stamp of the source files, sha256 of the payload, payload length
+_HEADER = struct.Struct("<4sH32s32sQ")
+
+_formatter = string.Formatter()
+
+
+class BundleError(Exception):
+    """The bundle is missing, corrupted, outdated or failed validation."""
+
+
+def read_language_dir(path: str | Path) -> Strings:
+    """Read every `<locale>.json` file of a language directory."""
+    return {
+        file.stem: json.loads(file.read_text(encoding="utf-8"))
+        for file in sorted(Path(path).glob("*.json"))
+    }
+
+
+def source_stamp(path: str | Path) -> bytes:
+    """Return a sha256 of the names, sizes and mtimes of the `<locale>.json` files.
+
+    Stored in the bundle header, so a bundle built before the files were edited is detected
+    from a `stat` of each file, without reading them.
+    """
+    digest = hashlib.sha256()
+    for file in sorted(Path(path).glob("*.json")):
+        stat = file.stat()
+        digest.update(f"{file.name}\0{stat.st_size}\0{stat.st_mtime_ns}\0".encode())
+    return digest.digest()
+
+
+def _fields(text: str) -> set[str]:
+    return {field for _, field, _, _ in _formatter.parse(text) if field is not None}
+
+
+def _check_template(text: object) -> tuple[set[str], str | None]:
+    """Return the placeholders of a template, or why it isn't a valid one."""
+    if not isinstance(text, str):
+        return set(), f"expected a string, got {type(text).__name__}"
+    try:
+        return _fields(text), None
+    except ValueError as e:
+        return set(), f"malformed template: {e}"
+
+
+def validate(strings: Strings, default_locale: str = DEFAULT_LOCALE) -> tuple[list[str], list[str]]:
+    """Check the strings of every locale against the default locale.
+
+    Parameters
+    ----------
+    strings : Strings
+        The localized strings, as `{locale: {key: text}}`.
+    default_locale : str
+        The locale every other locale is compared against.
+
+    Returns
+    -------
+    tuple[list[str], list[str]]
+        The errors, i.e. locales Discord doesn't support, malformed templates, placeholders
+        the default locale doesn't have and keys missing from the default locale, and the
+        warnings, i.e. keys other
+        locales haven't translated yet.
+    """
+    errors: list[str] = []
+    warnings: list[str] = []
+
+    # the same check disnake does when it loads a file into its store.
+    errors.extend(
+        f"{locale}: not a locale Discord supports"
+        for locale in strings
+        if utils.as_valid_locale(locale) is None
+    )
+
+    default = strings.get(default_locale, {})
+    if not default:
+        errors.append(f"Default locale {default_locale} has no strings.")
+
+    expected: dict[str, set[str]] = {}
+    for key, text in default.items():
+        expected[key], error = _check_template(text)
+        if error is not None:
+            errors.append(f"{default_locale}: {error} for {key!r}")
+
+    for locale, texts in strings.items():
+        if locale == default_locale:
+            continue
+
+        for key, text in texts.items():
+            if key not in default:
+                errors.append(f"{locale}: {key!r} is missing from {default_locale}")
+                continue
+
+            fields, error = _check_template(text)
+            if error is not None:
+                errors.append(f"{locale}: {error} for {key!r}")
+            # a placeholder the callers don't pass would raise a KeyError at runtime.
+            elif unknown := fields - expected[key]:
+                errors.append(f"{locale}: unknown placeholders {sorted(unknown)} in {key!r}")
+
+        warnings.extend(
+            f"{locale}: {key!r} is not translated" for key in default if key not in texts
+        )
+
+    return errors, warnings
+
+
+def build_bundle(source: str | Path, output: str | Path) -> Strings:
+    """Validate a language directory and write it to a bundle file.
+
+    Parameters
+    ----------
+    source : str | Path
+        The language directory, one `<locale>.json` file per locale.
+    output : str | Path
+        Where to write the bundle.
+
+    Returns
+    -------
+    Strings
+        The bundled strings, by the locale names disnake uses, e.g. `de` for `de_DE.json`.
+
+    Raises
+    ------
+    BundleError
+        If validation fails. Nothing is written in that case.
+    """
+    strings = read_language_dir(source)
+
+    errors, warnings = validate(strings)
+    for warning in warnings:
+        logger.warning(warning)
+    if errors:
+        for error in errors:
+            logger.error(error)
+        msg = f"{len(errors)} error(s) in {source}, bundle not written."
+        raise BundleError(msg)
+
+    strings = {utils.as_valid_locale(locale) or locale: texts for locale, texts in strings.items()}
+
+    payload = json.dumps(strings, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    header = _HEADER.pack(
+        BUNDLE_MAGIC,
+        BUNDLE_VERSION,
+        source_stamp(source),
+        hashlib.sha256(payload).digest(),
+        len(payload),
+    )
+
+    # write next to the output and swap it in, so a running bot never reads half a bundle.
+    output = Path(output)
+    tmp = output.with_suffix(output.suffix + ".tmp")
+    tmp.write_bytes(header + payload)
+    tmp.replace(output)
+
+    logger.info(f"Wrote {len(strings)} locale(s) to {output} ({len(payload)} bytes)")
+    return strings
+
+
+def read_bundle(path: str | Path, *, source: str | Path | None = None) -> Strings:
+    """Read and verify a bundle file through a memory-mapped read.
+
+    Parameters
+    ----------
+    path : str | Path
+        The bundle file.
+    source : str | Path | None
+        The language directory the bundle was built from. When given, the bundle is rejected
+        if the files changed since it was built.
+
+    Returns
+    -------
+    Strings
+        The bundled strings.
+
+    Raises
+    ------
+    BundleError
+        If the file is missing or empty, from another format version, outdated or fails the
+        integrity check.
+    """
+    try:
+        file = Path(path).open("rb")  # noqa: SIM115
+    except OSError as e:
+        msg = f"Unable to open bundle {path}: {e}"
+        raise BundleError(msg) from e
+
+    with file:
+        try:
+            # an empty file can't be mapped, and raises ValueError.
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            msg = f"Unable to map bundle {path}: {e}"
+            raise BundleError(msg) from e
+
+        with mapped:
+            return _read_mapped(path, mapped, source)
+
+
+def _read_mapped(path: str | Path, mapped: mmap.mmap, source: str | Path | None) -> Strings:
+    if len(mapped) < _HEADER.size:
+        msg = f"Bundle {path} is truncated."
+        raise BundleError(msg)
+
+    magic, version, sources, digest, length = _HEADER.unpack_from(mapped)
+    if magic != BUNDLE_MAGIC:
+        msg = f"{path} is not a language bundle."
+        raise BundleError(msg)
+    if version != BUNDLE_VERSION:
+        msg = f"Bundle {path} has format version {version}, expected {BUNDLE_VERSION}."
+        raise BundleError(msg)
+    if source is not None and source_stamp(source) != sources:
+        msg = f"Bundle {path} is outdated, {source} changed since it was built."
+        raise BundleError(msg)
+
+    with memoryview(mapped)[_HEADER.size : _HEADER.size + length] as payload:
+        if len(payload) != length or hashlib.sha256(payload).digest() != digest:
+            msg = f"Bundle {path} failed its integrity check."
+            raise BundleError(msg)
+
+        return json.loads(bytes(payload))
+
+
+def main(argv: t.Sequence[str] | None = None) -> int:
+    """Build a bundle from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("source", nargs="?", default="src/lang/")
+    parser.add_argument("output", nargs="?", default="src/lang.bundle")
+    args = parser.parse_args(argv)
+
+    try:
+        build_bundle(args.source, args.output)
+    except BundleError as e:
+        logger.critical(str(e))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
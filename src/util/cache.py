@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import time
+import typing as t
+from collections import OrderedDict
+
+from src import log
+
+logger = log.get_logger(__name__)
+
+__all__ = (
+    "CacheEntry",
+    "CacheStats",
+    "ResponseCache",
+)
+
+
+class CacheEntry:
+    """A single cached response.
+
+    Parameters
+    ----------
+    data : t.Any
+        The processed response body, as returned by `json_or_text`.
+    expires_at : float
+        The monotonic timestamp after which the entry has to be revalidated.
+    etag : str | None
+        The `ETag` header of the response, used for `If-None-Match` revalidation.
+    last_modified : str | None
+        The `Last-Modified` header of the response, used for `If-Modified-Since` revalidation.
+    """
+
+    __slots__ = ("data", "etag", "expires_at", "last_modified")
+
+    def __init__(
+        self,
+        data: t.Any,  # noqa: ANN401
+        expires_at: float,
+        etag: str | None = None,
+        last_modified: str | None = None,
+    ) -> None:
+        self.data = data
+        self.expires_at = expires_at
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @property
+    def fresh(self) -> bool:
+        """Whether the entry can still be served without asking the upstream."""
+        return time.monotonic() < self.expires_at
+
+    @property
+    def revalidatable(self) -> bool:
+        """Whether the entry carries a validator that can be sent to the upstream."""
+        return self.etag is not None or self.last_modified is not None
+
+    def conditional_headers(self) -> dict[str, str]:
+        """Return the headers used to revalidate this entry."""
+        headers: dict[str, str] = {}
+        if self.etag is not None:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified is not None:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class CacheStats:
+    """Counters describing how a `ResponseCache` is performing."""
+
+    __slots__ = ("evictions", "hits", "misses", "revalidations")
+
+    def __init__(self) -> None:
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self.revalidations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Return the ratio of hits (including revalidations) to lookups."""
+        served = self.hits + self.revalidations
+        total = served + self.misses
+        return served / total if total else 0.0
+
+    def as_dict(self) -> dict[str, int | float]:
+        """Return the counters as a dictionary, handy for tables and logs."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "revalidations": self.revalidations,
+            "hit_rate": round(self.hit_rate, 4),
+        }
+
+
+class ResponseCache:
+    """A bounded TTL/LRU cache for HTTP responses.
+
+    Entries are keyed on method and URL. Expired entries are kept around until evicted so
+    they can be revalidated with `If-None-Match`/`If-Modified-Since`.
+
+    Parameters
+    ----------
+    max_size : int
+        The maximum amount of entries kept before the least recently used one is evicted.
+    default_ttl : float
+        How long, in seconds, an entry is considered fresh when the route doesn't specify a TTL.
+    """
+
+    def __init__(self, max_size: int = 512, default_ttl: float = 60.0) -> None:
+        if max_size <= 0:
+            msg = "max_size must be greater than 0."
+            raise ValueError(msg)
+
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+        self.stats = CacheStats()
+
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+
+    def __len__(self) -> int:
+        """Return the amount of cached responses, fresh or stale."""
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        """Whether a response is cached for `key`, fresh or stale."""
+        return key in self._entries
+
+    @staticmethod
+    def make_key(method: str, url: str) -> str:
+        """Return the cache key for a method and URL."""
+        return f"{method.upper()} {url}"
+
+    def get(self, key: str) -> CacheEntry | None:
+        """Return the entry for `key`, fresh or stale, and mark it as recently used.
+
+        Expired entries without validators are useless and are dropped here.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        if not entry.fresh and not entry.revalidatable:
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return entry
+
+    def set(  # noqa: PLR0913
+        self,
+        key: str,
+        data: t.Any,  # noqa: ANN401
+        *,
+        ttl: float | None = None,
+        etag: str | None = None,
+        last_modified: str | None = None,
+    ) -> CacheEntry:
+        """Store a response, evicting the least recently used entries when full."""
+        ttl = self.default_ttl if ttl is None else ttl
+        entry = CacheEntry(data, time.monotonic() + ttl, etag, last_modified)
+
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            evicted, _ = self._entries.popitem(last=False)
+            self.stats.evictions += 1
+            logger.debug(f"Evicted {evicted} from response cache")
+
+        return entry
+
+    def refresh(self, key: str, ttl: float | None = None) -> CacheEntry | None:
+        """Extend the lifetime of an entry after the upstream answered 304 Not Modified."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        entry.expires_at = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+        self._entries.move_to_end(key)
+        self.stats.revalidations += 1
+        return entry
+
+    def invalidate(self, key: str) -> None:
+        """Drop a single entry from the cache."""
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every entry from the cache, keeping the counters."""
+        self._entries.clear()
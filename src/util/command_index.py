@@ -0,0 +1,123 @@
+"""Rank command names for autocomplete, caching the command list of each audience."""
+
+from __future__ import annotations
+
+import collections
+import time
+import typing as t
+
+if t.TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+__all__ = (
+    "MAX_CHOICES",
+    "CommandIndex",
+    "IndexKey",
+    "rank",
+)
+
+# Discord rejects autocomplete responses with more choices.
+MAX_CHOICES = 25
+
+IndexKey = tuple[int | None, int, str]
+"""`(guild ID or None for DMs, permissions value, locale)`."""
+
+
+def _score(name: str, query: str) -> tuple[int, int] | None:
+    """Return how well `name` matches `query`, lower is better, None if it doesn't match.
+
+    Both must be casefolded. Exact matches rank first, then prefixes, prefixes of a
+    word (e.g. a subcommand), substrings and finally subsequences, which tolerate typos
+    like "hlp" for "help" and are ranked by how spread out the matched letters are.
+    """
+    if name == query:
+        return (0, 0)
+    if name.startswith(query):
+        return (1, len(name))
+
+    index = name.find(query)
+    if index > 0:
+        return (2 if name[index - 1] in " -_" else 3, index)
+
+    gaps = 0
+    position = -1
+    for char in query:
+        found = name.find(char, position + 1)
+        if found < 0:
+            return None
+        if position >= 0:
+            gaps += found - position - 1
+        position = found
+    return (4, gaps)
+
+
+def rank(names: Iterable[str], query: str, limit: int = MAX_CHOICES) -> list[str]:
+    """Return the names matching `query`, best match first, capped at `limit`."""
+    query = query.strip().casefold()
+    if not query:
+        return sorted(names, key=str.casefold)[:limit]
+
+    scored: list[tuple[tuple[int, int], str, str]] = []
+    for name in names:
+        folded = name.casefold()
+        score = _score(folded, query)
+        if score is not None:
+            scored.append((score, folded, name))
+
+    scored.sort()
+    return [name for _, _, name in scored[:limit]]
+
+
+class CommandIndex:
+    """Cache the command names each audience can see, and rank them against queries.
+
+    Parameters
+    ----------
+    max_size : int
+        How many audiences are kept, the least recently used are evicted.
+    ttl : float
+        How long, in seconds, the names of an audience are kept. Permission overrides can
+        change in a guild without any command sync, so the lists are refreshed regularly.
+    """
+
+    def __init__(self, max_size: int = 4096, ttl: float = 300.0) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits: int = 0
+        self.misses: int = 0
+
+        # key -> (names, monotonic timestamp after which they are listed again)
+        self._entries: collections.OrderedDict[IndexKey, tuple[tuple[str, ...], float]] = (
+            collections.OrderedDict()
+        )
+
+    def names(self, key: IndexKey, load: Callable[[], Iterable[str]]) -> tuple[str, ...]:
+        """Return the cached names of an audience, calling `load` to list them on a miss."""
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and now < entry[1]:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[0]
+
+        self.misses += 1
+        names = tuple(sorted(load(), key=str.casefold))
+        self._entries[key] = (names, now + self.ttl)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return names
+
+    def search(
+        self,
+        key: IndexKey,
+        query: str,
+        load: Callable[[], Iterable[str]],
+        limit: int = MAX_CHOICES,
+    ) -> list[str]:
+        """Return the names of an audience matching `query`, best match first."""
+        return rank(self.names(key, load), query, limit)
+
+    def clear(self) -> None:
+        """Forget every audience, e.g. after the commands changed."""
+        self._entries.clear()
@@ -0,0 +1,215 @@
+"""Sample the health of the process: event loop lag, memory, CPU, file descriptors and GC."""
+
+from __future__ import annotations
+
+import asyncio
+import gc
+import sys
+import threading
+import time
+import traceback
+import typing as t
+
+import psutil
+
+from src import log
+
+if t.TYPE_CHECKING:
+    from src.util.metrics import Gauge, MetricsRegistry
+
+logger = log.get_logger(__name__)
+
+__all__ = ("HealthSampler",)
+
+
+class HealthSampler:
+    """Periodically sample the health of the process from the event loop.
+
+    Loop lag is measured by a callback scheduled every `resolution` seconds: the later it
+    runs, the longer something held the loop. In debug mode a watchdog thread logs the
+    stack of the code holding the loop for longer than `slow_threshold`, so blocking calls
+    can be found in production.
+
+    Parameters
+    ----------
+    interval : float
+        How often, in seconds, a sample is taken.
+    log_interval : float | None
+        How often, in seconds, the latest sample is logged. None never logs it.
+    resolution : float
+        How often, in seconds, the loop lag probe runs.
+    debug : bool
+        Whether to run the watchdog thread logging slow loop steps.
+    slow_threshold : float
+        How long, in seconds, the loop may be held before its stack is logged.
+    registry : MetricsRegistry | None
+        Where to publish the samples as gauges, see `src.util.metrics`.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        interval: float = 10.0,
+        *,
+        log_interval: float | None = 300.0,
+        resolution: float = 0.1,
+        debug: bool = False,
+        slow_threshold: float = 0.25,
+        registry: MetricsRegistry | None = None,
+    ) -> None:
+        self.interval = interval
+        self.log_interval = log_interval
+        self.resolution = resolution
+        self.debug = debug
+        self.slow_threshold = slow_threshold
+
+        self.latest: dict[str, float] = {}
+        self.slow_steps: int = 0
+
+        self._process = psutil.Process()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._probe: asyncio.TimerHandle | None = None
+
+        # written by the probe, read by the sampler and the watchdog.
+        self._last_beat = time.monotonic()
+        self._max_lag = 0.0
+
+        # written by the GC callback, which runs on whichever thread triggered a collection.
+        self._gc_started = 0.0
+        self._gc_pause = 0.0
+        self._gc_max_pause = 0.0
+        self._gc_collections = [0, 0, 0]
+
+        self._watchdog: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+        self._gauges: dict[str, Gauge] = {}
+        if registry is not None:
+            for name, documentation in (
+                ("loop_lag_seconds", "Longest event loop lag since the previous sample."),
+                ("process_rss_bytes", "Resident memory of the process."),
+                ("process_cpu_percent", "CPU usage of the process since the previous sample."),
+                ("process_open_fds", "Open file descriptors or handles."),
+                ("gc_pause_seconds", "Time spent in garbage collection since the last sample."),
+            ):
+                self._gauges[name] = registry.gauge(f"bot_{name}", documentation)
+
+    def start(self) -> None:
+        """Start sampling on the running event loop."""
+        if self._task is not None:
+            return
+
+        self._loop = asyncio.get_running_loop()
+        self._stopped.clear()
+        self._process.cpu_percent(None)
+        gc.callbacks.append(self._on_gc)
+
+        self._last_beat = time.monotonic()
+        self._probe = self._loop.call_later(self.resolution, self._beat, self._last_beat)
+        self._task = self._loop.create_task(self._run())
+
+        if self.debug:
+            self._watchdog = threading.Thread(
+                target=self._watch,
+                args=(threading.get_ident(),),
+                name="loop-watchdog",
+                daemon=True,
+            )
+            self._watchdog.start()
+
+    def stop(self) -> None:
+        """Stop sampling."""
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._probe is not None:
+            self._probe.cancel()
+            self._probe = None
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
+
+    def _beat(self, scheduled: float) -> None:
+        now = time.monotonic()
+        self._max_lag = max(self._max_lag, now - scheduled - self.resolution)
+        self._last_beat = now
+
+        if self._loop is not None and not self._stopped.is_set():
+            self._probe = self._loop.call_later(self.resolution, self._beat, now)
+
+    def _on_gc(self, phase: str, info: dict[str, int]) -> None:
+        if phase == "start":
+            self._gc_started = time.perf_counter()
+            return
+
+        pause = time.perf_counter() - self._gc_started
+        self._gc_pause += pause
+        self._gc_max_pause = max(self._gc_max_pause, pause)
+        self._gc_collections[info["generation"]] += 1
+
+    def sample(self) -> dict[str, float]:
+        """Take a sample, resetting the maxima and the GC pause time."""
+        memory = self._process.memory_info()
+        if hasattr(self._process, "num_fds"):
+            fds = self._process.num_fds()
+        else:  # Windows
+            fds = self._process.num_handles()  # type: ignore[reportAttributeAccessIssue]
+
+        sample = {
+            "loop_lag": self._max_lag,
+            "rss": memory.rss,
+            "cpu_percent": self._process.cpu_percent(None),
+            "threads": self._process.num_threads(),
+            "open_fds": fds,
+            "gc_gen0": self._gc_collections[0],
+            "gc_gen1": self._gc_collections[1],
+            "gc_gen2": self._gc_collections[2],
+            "gc_pause": self._gc_pause,
+            "gc_max_pause": self._gc_max_pause,
+            "slow_steps": self.slow_steps,
+        }
+        self._max_lag = 0.0
+        self._gc_pause = 0.0
+        self._gc_max_pause = 0.0
+
+        self.latest = sample
+        if self._gauges:
+            self._gauges["loop_lag_seconds"].set(value=sample["loop_lag"])
+            self._gauges["process_rss_bytes"].set(value=sample["rss"])
+            self._gauges["process_cpu_percent"].set(value=sample["cpu_percent"])
+            self._gauges["process_open_fds"].set(value=sample["open_fds"])
+            self._gauges["gc_pause_seconds"].set(value=sample["gc_pause"])
+        return sample
+
+    async def _run(self) -> None:
+        next_log = time.monotonic() + (self.log_interval or 0)
+        while True:
+            await asyncio.sleep(self.interval)
+            sample = self.sample()
+
+            if self.log_interval is not None and time.monotonic() >= next_log:
+                next_log = time.monotonic() + self.log_interval
+                logger.info(
+                    f"Health: loop lag {sample['loop_lag'] * 1000:.1f} ms, "
+                    f"RSS {sample['rss'] / 1024 / 1024:.1f} MiB, "
+                    f"CPU {sample['cpu_percent']:.1f}%, {sample['open_fds']:.0f} FDs, "
+                    f"GC pause {sample['gc_pause'] * 1000:.1f} ms",
+                )
+
+    def _watch(self, loop_thread: int) -> None:
+        """Log the stack of the loop thread whenever the probe stops beating for too long."""
+        reported = 0.0
+        while not self._stopped.wait(self.slow_threshold / 2):
+            last_beat = self._last_beat
+            held = time.monotonic() - last_beat - self.resolution
+            if held < self.slow_threshold or last_beat == reported:
+                continue
+
+            frame = sys._current_frames().get(loop_thread)  # noqa: SLF001
+            if frame is None:
+                return
+
+            reported = last_beat
+            self.slow_steps += 1
+            stack = "".join(traceback.format_stack(frame))
+            logger.warning(f"Event loop held for {held * 1000:.0f} ms, currently in:\n{stack}")
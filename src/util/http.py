@@ -1,17 +1,32 @@
 from __future__ import annotations
 
 import asyncio
+import json
+import logging
 import typing as t
 
 import aiohttp
 import yarl
 
 from src import errors, log
+from src.util.breaker import CircuitBreakers
+from src.util.cache import CacheEntry, ResponseCache
+from src.util.pool import PoolMonitor
+from src.util.ratelimit import RateLimiter, backoff_delay, parse_retry_after
 
 logger = log.get_logger(__name__)
 
 
 SUCCESS_STATUS: int = 200
+NOT_MODIFIED_STATUS: int = 304
+TOO_MANY_REQUESTS_STATUS: int = 429
+SERVER_ERROR_STATUS: int = 500
+RETRYABLE_STATUSES: frozenset[int] = frozenset({500, 502, 503, 504})
+
+StreamMode = t.Literal["chunks", "lines", "ndjson"]
+
+CACHEABLE_METHODS: frozenset[str] = frozenset({"GET", "HEAD"})
+IDEMPOTENT_METHODS: frozenset[str] = frozenset({"GET", "HEAD", "OPTIONS"})
 
 
 async def json_or_text(
@@ -44,26 +59,144 @@ async def json_or_text(
 
 
 class Route:
-    """Handle route construction for HTTP requests."""
+    """Handle route construction for HTTP requests.
+
+    Parameters
+    ----------
+    method : str
+        The HTTP method of the request.
+    url : str
+        The URL of the request, without query parameters.
+    cache_ttl : float | None, optional
+        How long, in seconds, a response for this route stays fresh in the client's
+        response cache. Defaults to the cache's own TTL.
+    **params : int | str | bool
+        Query parameters appended to the URL.
+    """
 
-    def __init__(self, method: str, url: str, **params: int | str | bool) -> None:
+    def __init__(
+        self,
+        method: str,
+        url: str,
+        *,
+        cache_ttl: float | None = None,
+        **params: int | str | bool,
+    ) -> None:
         self.method = method
+        self.cache_ttl = cache_ttl
 
         new_url: yarl.URL = yarl.URL(url).with_query(params)
         self.url: str = new_url.human_repr()
 
 
+class BatchResult:
+    """The outcome of a single request sent through `APIHTTPClient.request_many`.
+
+    Parameters
+    ----------
+    index : int
+        The position of the route in the batch.
+    route : Route
+        The route that was requested.
+    data : dict[str, t.Any] | list[dict[str, t.Any]] | str | None
+        The response data, if the request succeeded.
+    error : Exception | None
+        The error raised by the request, if it failed.
+    """
+
+    __slots__ = ("data", "error", "index", "route")
+
+    def __init__(
+        self,
+        index: int,
+        route: Route,
+        data: dict[str, t.Any] | list[dict[str, t.Any]] | str | None = None,
+        error: Exception | None = None,
+    ) -> None:
+        self.index = index
+        self.route = route
+        self.data = data
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        """Whether the request succeeded."""
+        return self.error is None
+
+
+class RequestPolicy(t.NamedTuple):
+    """How an `APIHTTPClient` caches, coalesces, throttles and retries its requests.
+
+    Attributes
+    ----------
+    cache : ResponseCache | None
+        An opt-in cache for GET/HEAD responses. Defaults to no caching.
+    coalesce : bool
+        Whether concurrent identical idempotent requests share a single in-flight request.
+        Defaults to True.
+    ratelimiter : RateLimiter | None
+        The per-host rate limiter requests go through. Defaults to one that only throttles
+        on `Retry-After` and `X-RateLimit-*` headers.
+    breakers : CircuitBreakers | None
+        The per-host circuit breakers requests go through. Defaults to breakers opening
+        after 5 consecutive failed requests for 30 seconds.
+    max_retries : int
+        How many times a request is retried after a 429, or after a transient 5xx or
+        connection error for idempotent methods. Defaults to 3.
+    max_retry_after : float
+        The longest `Retry-After`, in seconds, a request waits for before being retried.
+        Longer delays raise `errors.RateLimitedError` instead. Defaults to 60.
+    """
+
+    cache: ResponseCache | None = None
+    coalesce: bool = True
+    ratelimiter: RateLimiter | None = None
+    breakers: CircuitBreakers | None = None
+    max_retries: int = 3
+    max_retry_after: float = 60.0
+
+
 class APIHTTPClient:
-    """Represent an HTTP Client used for making requests to APIs."""
+    """Represent an HTTP Client used for making requests to APIs.
+
+    Parameters
+    ----------
+    connector : aiohttp.BaseConnector | None, optional
+        The connector used by the underlying session, see `src.util.pool.create_connector`.
+        The client owns it and closes it in `close`.
+    loop : asyncio.AbstractEventLoop | None, optional
+        The event loop the session runs on. Defaults to the running loop.
+    policy : RequestPolicy | None, optional
+        How requests are cached, coalesced, throttled and retried. Defaults to
+        `RequestPolicy()`.
+    trace_configs : list[aiohttp.TraceConfig] | None, optional
+        Extra request tracing, e.g. to record metrics, added to the pool telemetry.
+    """
 
     def __init__(
         self,
         connector: aiohttp.BaseConnector | None = None,
         *,
         loop: asyncio.AbstractEventLoop | None = None,
+        policy: RequestPolicy | None = None,
+        trace_configs: list[aiohttp.TraceConfig] | None = None,
     ) -> None:
+        policy = policy or RequestPolicy()
+
         self.loop = loop or asyncio.get_running_loop()
         self.connector = connector
+        self.cache = policy.cache
+        self.coalesce = policy.coalesce
+        self.ratelimiter = policy.ratelimiter or RateLimiter()
+        self.max_retries = policy.max_retries
+        self.breakers = policy.breakers or CircuitBreakers()
+        self.max_retry_after = policy.max_retry_after
+
+        self.pool_monitor = PoolMonitor()
+        self.trace_configs = [self.pool_monitor.trace_config, *(trace_configs or ())]
+
+        self.coalesced_requests: int = 0
+        self._inflight: dict[tuple[t.Any, ...], asyncio.Task[t.Any]] = {}
 
         self.__session: aiohttp.ClientSession = None  # type: ignore[reportAttributeAccessIssue]
 
@@ -77,7 +210,26 @@ class APIHTTPClient:
         using the provided connector and loop.
         """
         if not self.__session or self.__session.closed:
-            self.__session = aiohttp.ClientSession(connector=self.connector, loop=self.loop)
+            # the connector outlives the session so a recreated session keeps the same pool.
+            self.__session = aiohttp.ClientSession(
+                connector=self.connector,
+                connector_owner=self.connector is None,
+                loop=self.loop,
+                trace_configs=self.trace_configs,
+            )
+
+    async def close(self) -> None:
+        """Close the session and the connector, releasing every pooled connection."""
+        if self.__session and not self.__session.closed:
+            await self.__session.close()
+
+        if self.connector is not None and not self.connector.closed:
+            await self.connector.close()
+
+    def pool_stats(self) -> dict[str, int | float]:
+        """Return the connection pool telemetry, see `PoolMonitor.stats`."""
+        connector = self.connector or (self.__session.connector if self.__session else None)
+        return self.pool_monitor.stats(connector)
 
     async def request(
         self,
@@ -90,6 +242,19 @@ class APIHTTPClient:
         This method constructs and sends an HTTP request based on the specified route and headers.
         It processes the response to return JSON data or raw text, handling errors as needed.
 
+        Concurrent calls for the same idempotent route and headers are coalesced into one
+        upstream request, every caller receiving its result (or its error). The returned
+        object is shared between those callers and should not be mutated.
+
+        When the client has a response cache, fresh GET/HEAD responses are served from it and
+        stale ones are revalidated with the upstream, reusing the cached data on a 304.
+
+        Requests are throttled per host and retried with jittered exponential backoff on 429s,
+        honoring `Retry-After` up to `max_retry_after`. Idempotent requests are also retried
+        on transient 5xx responses and connection errors. Once requests to a host keep failing
+        after their retries, its circuit breaker opens, and requests to it fail fast until it
+        recovers.
+
         Parameters
         ----------
         route : Route
@@ -107,7 +272,47 @@ class APIHTTPClient:
         ------
         errors.GeneralHTTPError
             Will raise if the request fails or the response indicates an error.
+        errors.CircuitOpenError
+            Will raise if the circuit breaker of the host is open.
+        errors.RateLimitedError
+            Will raise if the host asks to retry later than `max_retry_after`.
         """
+        if not self.coalesce or route.method.upper() not in IDEMPOTENT_METHODS:
+            return await self._request(route, headers)
+
+        key = (
+            route.method.upper(),
+            route.url,
+            tuple(sorted(headers.items())) if headers else (),
+        )
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = self.loop.create_task(self._request(route, headers))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget_inflight(key, done))
+        else:
+            self.coalesced_requests += 1
+            logger.debug(f"{route.method} {route.url} joined an in-flight request")
+
+        # shield so a cancelled caller doesn't cancel the request for everyone else.
+        return await asyncio.shield(task)
+
+    def _forget_inflight(self, key: tuple[t.Any, ...], task: asyncio.Task[t.Any]) -> None:
+        """Remove a finished request from the in-flight table."""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+        # mark the exception as retrieved in case every caller was cancelled.
+        if not task.cancelled():
+            task.exception()
+
+    async def _request(
+        self,
+        route: Route,
+        headers: dict[str, str] | None = None,
+    ) -> dict[str, t.Any] | list[dict[str, t.Any]] | str:
+        """Send a single request, going through the response cache if there is one."""
         self.ensure_session()
 
         method = route.method
@@ -120,15 +325,381 @@ class APIHTTPClient:
         else:
             headers = _headers
 
-        async with self.__session.request(method, url, headers=headers) as response:
-            logger.debug(f"{method} {url} returned {response.status}")
+        cache = self.cache if method.upper() in CACHEABLE_METHODS else None
+        entry = None
+        if cache is not None:
+            entry = cache.get(ResponseCache.make_key(method, url))
+
+            if entry is not None and entry.fresh:
+                cache.stats.hits += 1
+                logger.debug(f"{method} {url} served from cache")
+                return entry.data
+
+            if entry is not None:
+                headers = {**headers, **entry.conditional_headers()}
+
+        host = yarl.URL(url).host or ""
+
+        # the breaker counts logical requests, a request failing after its retries is one failure.
+        breaker = self.breakers.get(host)
+        if not breaker.allow():
+            raise errors.CircuitOpenError(host, breaker.retry_after)
+
+        # None releases the trial call of a half-open breaker, e.g. when cancelled.
+        success: bool | None = None
+        try:
+            async with await self._send(method, url, headers, host) as response:
+                # a failure to read the body is recorded below.
+                success = response.status < SERVER_ERROR_STATUS
+                return await self._handle_response(route, response, cache, entry)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            success = False
+            raise
+        finally:
+            breaker.settle(success=success)
+
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        headers: dict[str, str],
+        host: str,
+    ) -> aiohttp.ClientResponse:
+        """Send a request, retrying it as allowed, and return its final response."""
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+
+        for attempt in range(self.max_retries):
+            try:
+                response = await self._attempt(method, url, headers, host)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if not idempotent:
+                    raise
+
+                delay = backoff_delay(attempt)
+                logger.warning(
+                    "%s %s failed (%r), retrying in %.2fs",
+                    method,
+                    url,
+                    e,
+                    delay,
+                    extra={"dedup_key": (host, type(e))},
+                )
+            else:
+                delay = self._retry_delay(response, attempt, idempotent=idempotent)
+                if delay is None:
+                    return response
+
+                response.release()
+                logger.warning(
+                    "%s %s returned %s, retrying in %.2fs",
+                    method,
+                    url,
+                    response.status,
+                    delay,
+                    extra={"dedup_key": (host, response.status)},
+                )
+
+            await asyncio.sleep(delay)
+
+        # the last attempt is final, whatever its outcome.
+        return await self._attempt(method, url, headers, host)
+
+    async def _attempt(
+        self,
+        method: str,
+        url: str,
+        headers: dict[str, str],
+        host: str,
+    ) -> aiohttp.ClientResponse:
+        """Send a request once, through the rate limiter of its host."""
+        await self.ratelimiter.acquire(host)
+
+        response = await self.__session.request(method, url, headers=headers)
+        logger.debug(f"{method} {url} returned {response.status}")
+        self.ratelimiter.update_from_headers(host, response.headers)
+        return response
+
+    def _retry_delay(
+        self,
+        response: aiohttp.ClientResponse,
+        attempt: int,
+        *,
+        idempotent: bool,
+    ) -> float | None:
+        """Return how long to wait before retrying a response, or None if it is final.
+
+        Raises
+        ------
+        errors.RateLimitedError
+            If the response asks to retry later than `max_retry_after`.
+        """
+        status = response.status
+        if status != TOO_MANY_REQUESTS_STATUS and not (idempotent and status in RETRYABLE_STATUSES):
+            return None
+
+        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        if retry_after is not None and retry_after > self.max_retry_after:
+            response.release()
+            raise errors.RateLimitedError(response.method, str(response.url), retry_after)
+        if status == TOO_MANY_REQUESTS_STATUS and retry_after is not None:
+            self.ratelimiter.block(response.url.host or "", retry_after)
+
+        return backoff_delay(attempt) if retry_after is None else retry_after
 
-            # errors typically have text involved, so this should be safe 99.5% of the time.
-            data = await json_or_text(response)
+    async def _handle_response(
+        self,
+        route: Route,
+        response: aiohttp.ClientResponse,
+        cache: ResponseCache | None,
+        entry: CacheEntry | None,
+    ) -> dict[str, t.Any] | list[dict[str, t.Any]] | str:
+        """Turn a final response into data, updating the cache or raising as needed."""
+        method = route.method
+        url = route.url
+        cache_key = ResponseCache.make_key(method, url)
+
+        if cache is not None and entry is not None and response.status == NOT_MODIFIED_STATUS:
+            cache.refresh(cache_key, route.cache_ttl)
+            return entry.data
+
+        if cache is not None:
+            cache.stats.misses += 1
+
+        # errors typically have text involved, so this should be safe 99.5% of the time.
+        data = await json_or_text(response)
+        # formatting a large payload is expensive, skip it entirely unless it is logged.
+        if logger.isEnabledFor(logging.DEBUG):
             logger.debug(f"{method} {url} received {data}")
 
-            if response.status == SUCCESS_STATUS:
+        if response.status == SUCCESS_STATUS:
+            if cache is not None:
+                cache.set(
+                    cache_key,
+                    data,
+                    ttl=route.cache_ttl,
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified"),
+                )
+
+            return data
+
+        raise errors.GeneralHTTPError(method, url, response.status)
+
+    async def request_many(
+        self,
+        routes: t.Iterable[Route],
+        headers: dict[str, str] | None = None,
+        *,
+        concurrency: int = 10,
+    ) -> list[BatchResult]:
+        """
+        Send requests to many routes, at most `concurrency` at a time.
+
+        A failing request doesn't abort the batch, its error is reported in its result.
+
+        Parameters
+        ----------
+        routes : t.Iterable[Route]
+            The routes to request.
+        headers : dict[str, str] | None, optional
+            Optional headers to include with every request. Defaults to None.
+        concurrency : int, optional
+            The maximum amount of requests in flight at once. Defaults to 10.
+
+        Returns
+        -------
+        list[BatchResult]
+            One result per route, in the same order as `routes`.
+        """
+        results = [
+            result
+            async for result in self.request_many_as_completed(
+                routes,
+                headers,
+                concurrency=concurrency,
+            )
+        ]
+        results.sort(key=lambda result: result.index)
+        return results
+
+    async def request_many_as_completed(
+        self,
+        routes: t.Iterable[Route],
+        headers: dict[str, str] | None = None,
+        *,
+        concurrency: int = 10,
+    ) -> t.AsyncIterator[BatchResult]:
+        """
+        Send requests to many routes, yielding each result as soon as it completes.
+
+        Use `BatchResult.index` to match a result to its route. Pending requests are
+        cancelled when the iterator is closed early.
 
-                return data
+        Parameters
+        ----------
+        routes : t.Iterable[Route]
+            The routes to request.
+        headers : dict[str, str] | None, optional
+            Optional headers to include with every request. Defaults to None.
+        concurrency : int, optional
+            The maximum amount of requests in flight at once. Defaults to 10.
+
+        Yields
+        ------
+        BatchResult
+            The result of each request, in completion order.
+        """
+        if concurrency <= 0:
+            msg = "concurrency must be greater than 0."
+            raise ValueError(msg)
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(index: int, route: Route) -> BatchResult:
+            async with semaphore:
+                try:
+                    # copy the headers, request() adds its own to them.
+                    data = await self.request(route, dict(headers) if headers else None)
+                except (
+                    errors.BaseBotError,
+                    errors.GeneralHTTPError,
+                    aiohttp.ClientError,
+                    asyncio.TimeoutError,
+                ) as e:
+                    return BatchResult(index, route, error=e)
+                return BatchResult(index, route, data=data)
+
+        tasks = [self.loop.create_task(run(i, route)) for i, route in enumerate(routes)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def stream(  # noqa: PLR0913
+        self,
+        route: Route,
+        headers: dict[str, str] | None = None,
+        *,
+        mode: StreamMode = "chunks",
+        chunk_size: int = 65536,
+        max_body_size: int | None = None,
+    ) -> t.AsyncIterator[t.Any]:
+        """
+        Send a request to the specified route and yield the response body as it arrives.
+
+        Unlike `request`, the body is never buffered as a whole, so large or long-lived
+        responses can be processed incrementally. Streams go through the rate limiter but
+        are neither cached, coalesced nor retried.
+
+        Parameters
+        ----------
+        route : Route
+            The route object containing the method and URL for the request.
+        headers : dict[str, str] | None, optional
+            Optional headers to include with the request. Defaults to None.
+        mode : StreamMode, optional
+            What to yield: raw `bytes` chunks, decoded `str` lines, or one parsed JSON
+            object per line (NDJSON). Defaults to "chunks".
+        chunk_size : int, optional
+            The maximum size of the chunks read from the connection. Defaults to 64 KiB.
+        max_body_size : int | None, optional
+            The maximum amount of bytes read before giving up. Defaults to no limit.
+
+        Yields
+        ------
+        bytes | str | t.Any
+            The chunks, lines or records of the response body.
+
+        Raises
+        ------
+        errors.GeneralHTTPError
+            Will raise if the response indicates an error.
+        errors.ResponseTooLargeError
+            Will raise if the body exceeds `max_body_size`.
+        errors.CircuitOpenError
+            Will raise if the circuit breaker of the host is open.
+        """
+        self.ensure_session()
+
+        method = route.method
+        url = route.url
 
-            raise errors.GeneralHTTPError(method, url, response.status)
+        headers = {**(headers or {}), "Accept": "application/json"}
+        if mode == "ndjson":
+            headers["Accept"] = "application/x-ndjson, application/json"
+
+        host = yarl.URL(url).host or ""
+        breaker = self.breakers.get(host)
+        if not breaker.allow():
+            raise errors.CircuitOpenError(host, breaker.retry_after)
+
+        # None releases the trial call of a half-open breaker, e.g. when cancelled.
+        success: bool | None = None
+        try:
+            async with await self._attempt(method, url, headers, host) as response:
+                # a failure to read the body is recorded below.
+                success = response.status < SERVER_ERROR_STATUS
+                if response.status != SUCCESS_STATUS:
+                    raise errors.GeneralHTTPError(method, url, response.status)
+
+                if max_body_size is not None and (response.content_length or 0) > max_body_size:
+                    raise errors.ResponseTooLargeError(url, max_body_size)
+
+                async for item in self._iter_body(response, mode, chunk_size, max_body_size):
+                    yield item
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            success = False
+            raise
+        finally:
+            breaker.settle(success=success)
+
+    @classmethod
+    async def _iter_body(
+        cls: type[APIHTTPClient],
+        response: aiohttp.ClientResponse,
+        mode: StreamMode,
+        chunk_size: int,
+        max_body_size: int | None,
+    ) -> t.AsyncIterator[t.Any]:
+        """Yield the body of a response as chunks, lines or NDJSON records."""
+        chunks = cls._iter_chunks(response, chunk_size, max_body_size)
+
+        if mode == "chunks":
+            async for chunk in chunks:
+                yield chunk
+            return
+
+        async for line in _iter_lines(chunks):
+            if mode == "lines":
+                yield line.decode("utf-8")
+            elif line.strip():
+                yield json.loads(line)
+
+    @staticmethod
+    async def _iter_chunks(
+        response: aiohttp.ClientResponse,
+        chunk_size: int,
+        max_body_size: int | None,
+    ) -> t.AsyncIterator[bytes]:
+        """Yield the raw body of a response, enforcing the size limit."""
+        received = 0
+        async for chunk in response.content.iter_chunked(chunk_size):
+            received += len(chunk)
+            if max_body_size is not None and received > max_body_size:
+                raise errors.ResponseTooLargeError(str(response.url), max_body_size)
+            yield chunk
+
+
+async def _iter_lines(chunks: t.AsyncIterator[bytes]) -> t.AsyncIterator[bytes]:
+    """Split a stream of chunks into lines, without the line endings."""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.rstrip(b"\r")
+
+    if buffer:
+        yield buffer.rstrip(b"\r")
@@ -0,0 +1,185 @@
+"""Defer importing extensions until one of their commands or listeners is used.
+
+The manifest is built from an eager load of every extension, with
+`python -m src.util.lazy src/exts src/exts/manifest.json`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sys
+import typing as t
+from pathlib import Path
+
+from src import log
+from src.components.router import router
+
+if t.TYPE_CHECKING:
+    from disnake.ext import commands
+
+logger = log.get_logger(__name__)
+
+__all__ = (
+    "LazyExtensions",
+    "build_manifest",
+    "discover_extensions",
+)
+
+Manifest = dict[str, dict[str, list[str]]]
+"""Extension metadata, as `{extension: {"commands": [...], "listeners": [...], ...}}`.
+
+`"components"` lists the custom ID prefixes an extension routes, see `src.components.router`.
+"""
+
+
+def discover_extensions(path: str) -> list[str]:
+    """Return the module names of the extensions in `path`."""
+    return [
+        f"src.exts.{item[:-3]}"
+        for item in sorted(os.listdir(path))
+        if "__" not in item and item.endswith(".py")
+    ]
+
+
+def build_manifest(bot: commands.InteractionBot, path: str) -> Manifest:
+    """Load every extension in `path` and record which commands, listeners and components it adds.
+
+    Parameters
+    ----------
+    bot : commands.InteractionBot
+        A bot without any extension loaded.
+    path : str
+        The path where the extensions are found.
+
+    Returns
+    -------
+    Manifest
+        The commands, listened events and component prefixes of every extension.
+    """
+    manifest: Manifest = {}
+
+    for ext in discover_extensions(path):
+        commands_before = _command_names(bot)
+        listeners_before = {event: len(funcs) for event, funcs in bot.extra_events.items()}
+        components_before = router.prefixes
+
+        bot.load_extension(ext)
+
+        manifest[ext] = {
+            "commands": sorted(_command_names(bot) - commands_before),
+            "listeners": sorted(
+                event
+                for event, funcs in bot.extra_events.items()
+                if len(funcs) > listeners_before.get(event, 0)
+            ),
+            "components": sorted(router.prefixes - components_before),
+        }
+
+    return manifest
+
+
+def _command_names(bot: commands.InteractionBot) -> set[str]:
+    return {
+        *bot.all_slash_commands,
+        *bot.all_user_commands,
+        *bot.all_message_commands,
+    }
+
+
+class LazyExtensions:
+    """Track extensions that are registered from a manifest but not imported yet.
+
+    Parameters
+    ----------
+    manifest : Manifest
+        The commands, listened events and component prefixes of every extension.
+    """
+
+    def __init__(self, manifest: Manifest) -> None:
+        self.pending: set[str] = set(manifest)
+
+        self._commands: dict[str, str] = {}
+        self._events: dict[str, set[str]] = {}
+        self._components: dict[str, str] = {}
+        for ext, meta in manifest.items():
+            for name in meta.get("commands", ()):
+                self._commands[name] = ext
+            for event in meta.get("listeners", ()):
+                self._events.setdefault(event, set()).add(ext)
+            for prefix in meta.get("components", ()):
+                self._components[prefix] = ext
+
+        # ext -> (seconds spent importing it, RSS growth in bytes)
+        self.loaded: dict[str, tuple[float, int]] = {}
+
+    @classmethod
+    def from_file(cls: type[LazyExtensions], path: str | Path) -> LazyExtensions:
+        """Read a manifest written by `python -m src.util.lazy`.
+
+        Raises
+        ------
+        OSError
+            If the manifest can't be read.
+        ValueError
+            If the manifest isn't valid JSON.
+        """
+        return cls(json.loads(Path(path).read_text(encoding="utf-8")))
+
+    def for_command(self, name: str) -> str | None:
+        """Return the pending extension providing a command, if any."""
+        ext = self._commands.get(name)
+        return ext if ext in self.pending else None
+
+    def for_component(self, prefix: str) -> str | None:
+        """Return the pending extension handling a component custom ID prefix, if any."""
+        ext = self._components.get(prefix)
+        return ext if ext in self.pending else None
+
+    def for_event(self, event: str) -> list[str]:
+        """Return the pending extensions listening to an event, e.g. `on_button_click`."""
+        if event not in self._events:
+            return []
+        return [ext for ext in self._events[event] if ext in self.pending]
+
+    @property
+    def has_listeners(self) -> bool:
+        """Whether a pending extension still listens to any event."""
+        return bool(self._events)
+
+    def mark_loaded(self, ext: str, seconds: float, rss: int) -> None:
+        """Record that an extension has been imported and wired."""
+        self.pending.discard(ext)
+        self.loaded[ext] = (seconds, rss)
+
+        for event in [event for event, exts in self._events.items() if not exts & self.pending]:
+            del self._events[event]
+
+    def stats(self) -> dict[str, int | float]:
+        """Return how much startup time and memory was deferred by not loading eagerly."""
+        return {
+            "pending": len(self.pending),
+            "loaded": len(self.loaded),
+            "deferred_seconds": sum(seconds for seconds, _ in self.loaded.values()),
+            "deferred_rss": sum(rss for _, rss in self.loaded.values()),
+        }
+
+
+async def _build(source: str, output: str) -> None:
+    import disnake
+
+    from src.bot import Bot
+
+    bot = Bot(intents=disnake.Intents.none(), owner_ids=set(), reload=False)
+    try:
+        manifest = build_manifest(bot, source)
+    finally:
+        await bot.close()
+
+    Path(output).write_text(json.dumps(manifest, indent=2) + "\n", encoding="utf-8")
+    logger.info(f"Wrote the manifest of {len(manifest)} extension(s) to {output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(_build(*(sys.argv[1:] or ["src/exts", "src/exts/manifest.json"])))
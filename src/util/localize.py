@@ -1,16 +1,109 @@
 from __future__ import annotations
 
+import functools
+import json
+import string
 import typing as t
+from pathlib import Path
+
+from disnake import LocalizationStore
+
+from src import log
+from src.util.bundle import BundleError, Strings, read_bundle, read_language_dir
 
 if t.TYPE_CHECKING:
-    from disnake import Locale, LocalizationProtocol, LocalizationStore
+    from disnake import Locale, LocalizationProtocol
+
+logger = log.get_logger(__name__)
 
 LocalizedStr = t.NewType("LocalizedStr", str)
 
+_formatter = string.Formatter()
+
+
+class Template:
+    """A localized string, validated once when it is loaded.
+
+    Strings without placeholders are rendered once and returned as-is. The others are
+    rendered by `str.format_map`, whose parser in C is faster than joining the parsed
+    segments in Python.
+
+    Parameters
+    ----------
+    text : str
+        The `str.format` style template.
+
+    Raises
+    ------
+    ValueError
+        If the template is malformed, e.g. has an unmatched brace.
+    """
+
+    __slots__ = ("fields", "static", "text")
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+        parts = tuple(_formatter.parse(text))
+        self.fields: tuple[str, ...] = tuple(field for _, field, _, _ in parts if field is not None)
+
+        # placeholder-free strings are rendered once and served as-is afterwards.
+        self.static: LocalizedStr | None = None
+        if not self.fields:
+            self.static = LocalizedStr("".join(literal for literal, *_ in parts))
+
+    def render(self, placeholders: t.Mapping[str, t.Any]) -> LocalizedStr:
+        """Fill in the placeholders of the template."""
+        if self.static is not None:
+            return self.static
+
+        return LocalizedStr(self.text.format_map(placeholders))
+
+
+@functools.lru_cache(maxsize=1024)
+def compile_template(text: str) -> Template:
+    """Return the parsed `Template` of a string, memoized."""
+    return Template(text)
+
+
+def _compile_locale(
+    texts: t.Mapping[str, str],
+    locale: str,
+    origin: str,
+) -> dict[tuple[str, str], Template]:
+    """Compile the strings of a locale into `(key, locale)` index entries.
+
+    Raises
+    ------
+    ValueError
+        If one of the strings is not a valid template, naming it and where it came from.
+    """
+    compiled: dict[tuple[str, str], Template] = {}
+    key = None
+    try:
+        for key, text in texts.items():
+            compiled[key, locale] = Template(text)
+    except ValueError as e:
+        msg = f"Invalid template for {key!r} in {origin}: {e}"
+        raise ValueError(msg) from e
+    return compiled
+
+
+def locale_chain(locale: str) -> tuple[str, ...]:
+    """Return the locales to try for a locale, most specific first.
+
+    `es-ES` falls back to `es`, after which the caller's default is used.
+    """
+    language, _, region = locale.partition("-")
+    return (locale, language) if region else (locale,)
+
 
 class Localization:
     """Handle the localization of various strings in command responses.
 
+    Once `load` has been called, every string is looked up in a flat `(key, locale)` index of
+    validated templates instead of going through the i18n store.
+
     Parameters
     ----------
     protocol: LocalizationStore | LocalizationProtocol
@@ -20,6 +113,114 @@ class Localization:
     def __init__(self, protocol: LocalizationStore | LocalizationProtocol) -> None:
         self._i18n = protocol
 
+        self._index: dict[tuple[str, str], Template] = {}
+        # `(key, locale)` -> the template found through the fallback chain, or None.
+        self._resolved: dict[tuple[str, str], Template | None] = {}
+
+    def load(self, path: str | Path) -> None:
+        """Load the language files into the i18n store and compile them into the index.
+
+        Parameters
+        ----------
+        path : str | Path
+            The directory of the language files, one `<locale>.json` file per locale.
+
+        Raises
+        ------
+        ValueError
+            If one of the strings is not a valid template.
+        """
+        self._i18n.load(path)  # type: ignore[reportUnknownMemberType]
+        self.compile(path)
+
+    def load_bundle(self, path: str | Path, *, fallback: str | Path) -> None:
+        """Load a compiled language bundle, see `src.util.bundle`.
+
+        Falls back to loading the JSON language directory when the bundle is missing, was
+        built from older language files or fails its integrity check.
+
+        The bundle was validated the way disnake validates language files when it was built,
+        so its strings are added to the store as they are.
+
+        Parameters
+        ----------
+        path : str | Path
+            The bundle file.
+        fallback : str | Path
+            The language directory to load instead of a bad bundle.
+        """
+        if not isinstance(self._i18n, LocalizationStore):
+            # a custom provider can only load from JSON, so there is nothing to gain.
+            self.load(fallback)
+            return
+
+        try:
+            strings = read_bundle(path, source=fallback)
+        except BundleError as e:
+            logger.warning(f"{e} Loading {fallback} instead.")
+            self.load(fallback)
+            return
+
+        for locale, texts in strings.items():
+            # LocalizationStore has no public way to add strings that aren't in a file.
+            self._i18n._load_dict(texts, locale)  # noqa: SLF001
+        self._compile_strings(strings)
+
+        logger.info(f"Loaded {len(strings)} locale(s) from {path}")
+
+    def compile(self, path: str | Path) -> None:
+        """Compile the language files in `path` into the `(key, locale)` index.
+
+        Parameters
+        ----------
+        path : str | Path
+            The directory of the language files, one `<locale>.json` file per locale.
+
+        Raises
+        ------
+        ValueError
+            If one of the strings is not a valid template.
+        """
+        self._compile_strings(read_language_dir(path))
+
+    def reload_file(self, path: str | Path) -> None:
+        """Reload a single `<locale>.json` file, leaving the other locales untouched.
+
+        Parameters
+        ----------
+        path : str | Path
+            The language file. When it no longer exists, its locale is dropped from the index.
+
+        Raises
+        ------
+        ValueError
+            If one of the strings is not a valid template.
+        """
+        path = Path(path)
+        locale = path.stem
+
+        texts: dict[str, str] = {}
+        if path.exists():
+            texts = json.loads(path.read_text(encoding="utf-8"))
+
+        index = {key: template for key, template in self._index.items() if key[1] != locale}
+        index.update(_compile_locale(texts, locale, path.name))
+
+        # only merged into the store once every template is valid.
+        if texts:
+            self._i18n.load(path)  # type: ignore[reportUnknownMemberType]
+        self._index = index
+        self._resolved = {}
+        logger.info(f"Reloaded {len(texts)} string(s) for {locale}")
+
+    def _compile_strings(self, strings: Strings) -> None:
+        index: dict[tuple[str, str], Template] = {}
+        for locale, texts in strings.items():
+            index.update(_compile_locale(texts, locale, locale))
+
+        self._index = index
+        self._resolved = {}
+
     def get(
         self,
         default: str,
@@ -31,7 +232,8 @@ class Localization:
         Retrieve a localized version of a string based on the given locale and key.
 
         This function returns a localized string for the specified key and locale.
-        If a localized version is not available, the default string is returned.
+        If a localized version is not available, the language without its region
+        (e.g. `es` for `es-ES`) is tried before returning the default string.
 
         Parameters
         ----------
@@ -48,9 +250,30 @@ class Localization:
             The localized string corresponding to the key for the specified locale,
             or the default string if localization is not available.
         """
-        localizations = self._i18n.get(key)
-        if localizations is None:
-            return LocalizedStr(default.format(**placeholders))
+        code = locale.value
+
+        if self._index:
+            try:
+                template = self._resolved[key, code]
+            except KeyError:
+                template = self._resolved[key, code] = self._resolve(key, code)
+
+            if template is not None:
+                return template.render(placeholders)
+
+        else:
+            localizations = self._i18n.get(key) or {}
+            for candidate in locale_chain(code):
+                text = localizations.get(candidate)
+                if text is not None:
+                    return compile_template(text).render(placeholders)
+
+        return compile_template(default).render(placeholders)
 
-        localized_string = localizations.get(locale.value, default)
-        return LocalizedStr(localized_string.format(**placeholders))
+    def _resolve(self, key: str, locale: str) -> Template | None:
+        """Walk the fallback chain of a locale through the index."""
+        for candidate in locale_chain(locale):
+            template = self._index.get((key, candidate))
+            if template is not None:
+                return template
+        return None
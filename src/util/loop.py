@@ -0,0 +1,102 @@
+"""Run the bot on a selectable event loop backend.
+
+uvloop isn't a dependency, install it with `pip install uvloop` to use it. Eager tasks,
+which run a new task synchronously until its first suspension, need Python 3.12.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+import typing as t
+
+from src import log
+
+if t.TYPE_CHECKING:
+    from collections.abc import Callable, Coroutine
+
+logger = log.get_logger(__name__)
+
+__all__ = (
+    "BACKENDS",
+    "Backend",
+    "loop_factory",
+    "run",
+)
+
+Backend = t.Literal["auto", "asyncio", "uvloop"]
+BACKENDS: tuple[str, ...] = t.get_args(Backend)
+T = t.TypeVar("T")
+
+
+def loop_factory(backend: Backend) -> tuple[Callable[[], asyncio.AbstractEventLoop], str]:
+    """Return a function creating event loops of `backend`, and the backend actually used.
+
+    `auto` uses uvloop when it is installed. Both `auto` and `uvloop` fall back to asyncio's
+    default loop if uvloop can't be imported, only an explicit `uvloop` logs a warning.
+
+    Raises
+    ------
+    ValueError
+        If `backend` isn't one of `BACKENDS`, e.g. a typo in `EVENT_LOOP`.
+    """
+    if backend not in BACKENDS:
+        msg = f"Unknown event loop backend {backend!r}, EVENT_LOOP must be one of {BACKENDS}."
+        raise ValueError(msg)
+
+    if backend in ("auto", "uvloop"):
+        try:
+            import uvloop  # type: ignore[reportMissingImports]
+        except ImportError:
+            logger.log(
+                logging.WARNING if backend == "uvloop" else logging.INFO,
+                f"uvloop is not installed, falling back to the asyncio event loop ({backend=})",
+            )
+        else:
+            return uvloop.new_event_loop, "uvloop"
+
+    return asyncio.new_event_loop, "asyncio"
+
+
+def run(
+    main: Coroutine[t.Any, t.Any, T],
+    *,
+    backend: Backend = "auto",
+    eager_tasks: bool = False,
+) -> T:
+    """Run `main` to completion on a new event loop, like `asyncio.run`.
+
+    Parameters
+    ----------
+    main : Coroutine
+        The coroutine to run.
+    backend : Backend
+        The event loop implementation, see `loop_factory`.
+    eager_tasks : bool
+        Whether to start tasks eagerly. Ignored before Python 3.12.
+
+    Returns
+    -------
+    T
+        What `main` returned.
+    """
+    factory, used = loop_factory(backend)
+
+    eager = eager_tasks and hasattr(asyncio, "eager_task_factory")
+    if eager_tasks and not eager:
+        logger.warning("Eager tasks need Python 3.12, starting tasks lazily")
+    logger.info(f"Using the {used} event loop{' with eager tasks' if eager else ''}")
+
+    if sys.version_info < (3, 11):
+        if used == "uvloop":
+            import uvloop  # type: ignore[reportMissingImports]
+
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        return asyncio.run(main)
+
+    with asyncio.Runner(loop_factory=factory) as runner:
+        if eager:
+            task_factory = asyncio.eager_task_factory  # type: ignore[reportAttributeAccessIssue]
+            runner.get_loop().set_task_factory(task_factory)
+        return runner.run(main)
@@ -0,0 +1,533 @@
+"""Latency histograms, error counters and in-flight gauges, served in Prometheus text format."""
+
+from __future__ import annotations
+
+import abc
+import bisect
+import contextlib
+import contextvars
+import functools
+import time
+import typing as t
+
+import aiohttp
+from aiohttp import web
+
+from src import log
+from src.util.breaker import CircuitState
+
+if t.TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Coroutine
+    from types import SimpleNamespace
+
+    from src.util.http import APIHTTPClient
+
+logger = log.get_logger(__name__)
+
+__all__ = (
+    "BotMetrics",
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "MetricsRegistry",
+    "MetricsServer",
+)
+
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+Labels = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Labels, values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric(abc.ABC):
+    kind: t.ClassVar[str]
+
+    def __init__(self, name: str, documentation: str, labels: Labels = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+
+    def _header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    @abc.abstractmethod
+    def render(self) -> list[str]:
+        """Return the lines of the Prometheus text format."""
+
+
+class Counter(_Metric):
+    """A value that only goes up, e.g. the amount of errors."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Labels = ()) -> None:
+        super().__init__(name, documentation, labels)
+        self.values: dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        """Increase the value of the given label values."""
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def render(self) -> list[str]:
+        """Return the lines of the Prometheus text format."""
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labels, labels)} {value:g}"
+            for labels, value in self.values.items()
+        ]
+
+
+class Gauge(Counter):
+    """A value that goes up and down, e.g. the amount of commands running."""
+
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        """Decrease the value of the given label values."""
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels: str, value: float) -> None:
+        """Set the value of the given label values."""
+        self.values[labels] = value
+
+
+class Histogram(_Metric):
+    """Count observations, e.g. durations in seconds, into cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Labels = (),
+        buckets: t.Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [count per bucket..., count above the last bucket], sum
+        self.counts: dict[Labels, list[int]] = {}
+        self.sums: dict[Labels, float] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Record an observation for the given label values."""
+        counts = self.counts.get(labels)
+        if counts is None:
+            counts = self.counts[labels] = [0] * (len(self.buckets) + 1)
+            self.sums[labels] = 0.0
+
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sums[labels] += value
+
+    def render(self) -> list[str]:
+        """Return the lines of the Prometheus text format."""
+        lines = self._header()
+        for labels, counts in self.counts.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound:g}"'
+                bucket_labels = _format_labels(self.labels, labels, le)
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+
+            formatted = _format_labels(self.labels, labels)
+            lines.append(f"{self.name}_sum{formatted} {self.sums[labels]}")
+            lines.append(f"{self.name}_count{formatted} {cumulative}")
+        return lines
+
+
+_M = t.TypeVar("_M", bound=_Metric)
+
+
+class MetricsRegistry:
+    """Hold metrics and render them all at once.
+
+    Collectors are called right before rendering, to update gauges of values that are
+    cheaper to read on scrape than to track on every change.
+    """
+
+    def __init__(self) -> None:
+        self.metrics: dict[str, _Metric] = {}
+        self.collectors: list[Callable[[], None]] = []
+
+    def _register(self, metric: _M) -> _M:
+        if metric.name in self.metrics:
+            msg = f"A metric named {metric.name} is already registered."
+            raise ValueError(msg)
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Labels = ()) -> Counter:
+        """Create and register a counter."""
+        return self._register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Labels = ()) -> Gauge:
+        """Create and register a gauge."""
+        return self._register(Gauge(name, documentation, labels))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labels: Labels = (),
+        buckets: t.Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """Create and register a histogram."""
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """Call `collector` before every render."""
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        """Return every metric in the Prometheus text exposition format."""
+        for collector in self.collectors:
+            collector()
+
+        lines: list[str] = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class _Invocation:
+    """The command running in the current task, to attribute Discord REST calls to it."""
+
+    __slots__ = ("name", "responded", "rest_calls", "started")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.started = time.perf_counter()
+        self.responded = False
+        self.rest_calls = 0
+
+
+_invocation: contextvars.ContextVar[_Invocation | None] = contextvars.ContextVar(
+    "invocation",
+    default=None,
+)
+
+
+class BotMetrics:
+    """The metrics recorded by the bot.
+
+    Commands are timed from the moment the interaction is processed, both until they
+    finish and until their first response (message or defer) is sent, so slow handlers
+    can be told apart from slow REST round trips.
+    """
+
+    def __init__(self, registry: MetricsRegistry | None = None) -> None:
+        self.registry = registry or MetricsRegistry()
+        r = self.registry
+
+        self.command_duration = r.histogram(
+            "bot_command_duration_seconds",
+            "Time taken by application commands and autocompletes.",
+            ("command", "kind"),
+        )
+        self.command_response = r.histogram(
+            "bot_command_time_to_response_seconds",
+            "Time until an application command sends its first response or defers.",
+            ("command",),
+        )
+        self.command_rest_calls = r.histogram(
+            "bot_command_rest_calls",
+            "Discord REST requests made by each application command invocation.",
+            ("command",),
+            buckets=(0, 1, 2, 3, 4, 5, 8, 13),
+        )
+        self.command_errors = r.counter(
+            "bot_command_errors_total",
+            "Application commands that raised an error.",
+            ("command", "kind"),
+        )
+        self.commands_in_flight = r.gauge(
+            "bot_commands_in_flight",
+            "Application commands and autocompletes currently running.",
+            ("kind",),
+        )
+
+        self.listener_duration = r.histogram(
+            "bot_listener_duration_seconds",
+            "Time taken by event listeners.",
+            ("event", "listener"),
+        )
+        self.listener_errors = r.counter(
+            "bot_listener_errors_total",
+            "Event listeners that raised an error.",
+            ("event", "listener"),
+        )
+        self.listeners_in_flight = r.gauge(
+            "bot_listeners_in_flight",
+            "Event listeners currently running.",
+            ("event",),
+        )
+
+        self.discord_requests = r.histogram(
+            "bot_discord_request_duration_seconds",
+            "Duration of Discord REST requests, including rate limit waits.",
+            ("method", "route"),
+        )
+        self.cache_requests = r.counter(
+            "bot_cache_requests_total",
+            "Lookups of in-memory caches, by result.",
+            ("cache", "result"),
+        )
+        self.lazy_extension_load = r.gauge(
+            "bot_lazy_extension_load_seconds",
+            "Time taken to import and wire each lazily loaded extension.",
+            ("extension",),
+        )
+        self.lazy_extension_rss = r.gauge(
+            "bot_lazy_extension_rss_bytes",
+            "RSS growth caused by loading each lazily loaded extension.",
+            ("extension",),
+        )
+        self.lazy_extensions_pending = r.gauge(
+            "bot_lazy_extensions_pending",
+            "Extensions registered from the manifest that aren't imported yet.",
+        )
+        self.http_requests = r.histogram(
+            "bot_http_request_duration_seconds",
+            "Duration of requests made by the external API client.",
+            ("method", "host", "status"),
+        )
+        self.http_pool = r.gauge(
+            "bot_http_pool",
+            "Connection pool usage and counters of the external API client, see PoolMonitor.",
+            ("stat",),
+        )
+        self.http_breaker = r.gauge(
+            "bot_http_breaker",
+            "Failures, times opened and seconds until retry of each host's circuit breaker.",
+            ("host", "stat"),
+        )
+        self.http_breaker_state = r.gauge(
+            "bot_http_breaker_state",
+            "1 for the current state of each host's circuit breaker, 0 for the others.",
+            ("host", "state"),
+        )
+        self.http_cache = r.gauge(
+            "bot_http_cache",
+            "Response cache counters and hit rate of the external API client.",
+            ("stat",),
+        )
+        self.http_coalesced = r.gauge(
+            "bot_http_coalesced_requests",
+            "Requests of the external API client that joined an identical in-flight request.",
+        )
+
+    def watch_http_client(self, client: APIHTTPClient) -> None:
+        """Export the pool, breaker, cache and coalescing stats of `client` on every scrape."""
+
+        def collect() -> None:
+            for stat, value in client.pool_stats().items():
+                self.http_pool.set(stat, value=value)
+
+            for host, snapshot in client.breakers.snapshot().items():
+                current = snapshot.pop("state")
+                for state in CircuitState:
+                    self.http_breaker_state.set(host, state.value, value=state.value == current)
+                for stat, value in snapshot.items():
+                    self.http_breaker.set(host, stat, value=float(value))
+
+            if client.cache is not None:
+                for stat, value in client.cache.stats.as_dict().items():
+                    self.http_cache.set(stat, value=value)
+
+            self.http_coalesced.set(value=client.coalesced_requests)
+
+        self.registry.add_collector(collect)
+
+    @contextlib.asynccontextmanager
+    async def track_command(self, name: str, kind: str) -> t.AsyncIterator[None]:
+        """Time an application command or autocomplete running inside the block.
+
+        disnake handles command errors itself, those are counted by the bot with
+        `command_errors` when the error event is dispatched. Cancelled commands aren't
+        counted as errors.
+        """
+        invocation = _Invocation(name)
+        token = _invocation.set(invocation)
+        self.commands_in_flight.inc(kind)
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.command_errors.inc(name, kind)
+            raise
+        finally:
+            self.command_duration.observe(time.perf_counter() - started, name, kind)
+            if kind != "autocomplete":
+                self.command_rest_calls.observe(invocation.rest_calls, name)
+            self.commands_in_flight.dec(kind)
+            _invocation.reset(token)
+
+    def wrap_listener(
+        self,
+        coro: Callable[..., Coroutine[t.Any, t.Any, t.Any]],
+        event: str,
+    ) -> Callable[..., Coroutine[t.Any, t.Any, t.Any]]:
+        """Return `coro` timed as a listener of `event`."""
+        listener = getattr(coro, "__qualname__", repr(coro))
+
+        @functools.wraps(coro)
+        async def timed(*args: t.Any, **kwargs: t.Any) -> t.Any:  # noqa: ANN401
+            self.listeners_in_flight.inc(event)
+            started = time.perf_counter()
+            try:
+                return await coro(*args, **kwargs)
+            except Exception:
+                self.listener_errors.inc(event, listener)
+                raise
+            finally:
+                self.listener_duration.observe(time.perf_counter() - started, event, listener)
+                self.listeners_in_flight.dec(event)
+
+        return timed
+
+    def wrap_discord_request(
+        self,
+        request: Callable[..., Awaitable[t.Any]],
+    ) -> Callable[..., Awaitable[t.Any]]:
+        """Return disnake's `HTTPClient.request` timed per route.
+
+        Requests made while a command runs are counted for it, and the first interaction
+        callback marks its time to response.
+        """
+
+        @functools.wraps(request)
+        async def timed(route: t.Any, *args: t.Any, **kwargs: t.Any) -> t.Any:  # noqa: ANN401
+            invocation = _invocation.get()
+            if invocation is not None:
+                invocation.rest_calls += 1
+                if not invocation.responded and route.path.endswith("/callback"):
+                    invocation.responded = True
+                    self.command_response.observe(
+                        time.perf_counter() - invocation.started,
+                        invocation.name,
+                    )
+
+            started = time.perf_counter()
+            try:
+                return await request(route, *args, **kwargs)
+            finally:
+                self.discord_requests.observe(
+                    time.perf_counter() - started,
+                    route.method,
+                    route.path,
+                )
+
+        return timed
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        """Return a trace config timing the requests of an aiohttp session per host."""
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(self._on_request_start)
+        trace_config.on_request_end.append(self._on_request_end)
+        trace_config.on_request_exception.append(self._on_request_exception)
+        return trace_config
+
+    async def _on_request_start(
+        self,
+        session: aiohttp.ClientSession,
+        ctx: SimpleNamespace,
+        _: aiohttp.TraceRequestStartParams,
+    ) -> None:
+        ctx.request_started = session.loop.time()
+
+    async def _on_request_end(
+        self,
+        session: aiohttp.ClientSession,
+        ctx: SimpleNamespace,
+        params: aiohttp.TraceRequestEndParams,
+    ) -> None:
+        self.http_requests.observe(
+            session.loop.time() - ctx.request_started,
+            params.method,
+            params.url.host or "",
+            str(params.response.status),
+        )
+
+    async def _on_request_exception(
+        self,
+        session: aiohttp.ClientSession,
+        ctx: SimpleNamespace,
+        params: aiohttp.TraceRequestExceptionParams,
+    ) -> None:
+        self.http_requests.observe(
+            session.loop.time() - ctx.request_started,
+            params.method,
+            params.url.host or "",
+            type(params.exception).__name__,
+        )
+
+
+class MetricsServer:
+    """Serve a registry on `/metrics` for Prometheus to scrape.
+
+    Parameters
+    ----------
+    registry : MetricsRegistry
+        The metrics to serve.
+    host : str
+        The interface to listen on. Keep it local unless the port is firewalled.
+    port : int
+        The port to listen on.
+    """
+
+    def __init__(
+        self,
+        registry: MetricsRegistry,
+        host: str = "127.0.0.1",
+        port: int = 9100,
+    ) -> None:
+        self.registry = registry
+        self.host = host
+        self.port = port
+
+        self._runner: web.AppRunner | None = None
+
+    async def start(self) -> None:
+        """Start serving."""
+        app = web.Application()
+        app.router.add_get("/metrics", self._metrics)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+
+    async def stop(self) -> None:
+        """Stop serving."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _metrics(self, _: web.Request) -> web.Response:
+        return web.Response(
+            text=self.registry.render(),
+            content_type="text/plain",
+            charset="utf-8",
+        )
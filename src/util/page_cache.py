@@ -0,0 +1,105 @@
+"""Keep rendered embed pages, so identical command lists are only rendered once."""
+
+from __future__ import annotations
+
+import collections
+import hashlib
+import typing as t
+
+if t.TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+    import disnake
+
+    from src.util.metrics import Counter
+
+__all__ = (
+    "PageCache",
+    "PageKey",
+    "fingerprint",
+)
+
+PageKey = tuple[str, str]
+"""`(command set fingerprint, locale)`."""
+
+
+def fingerprint(names: Iterable[str]) -> str:
+    """Return a short hash identifying a set of command names, regardless of order."""
+    digest = hashlib.blake2b("\0".join(sorted(names)).encode(), digest_size=6)
+    return digest.hexdigest()
+
+
+class PageCache:
+    """A bounded LRU of rendered embed pages.
+
+    The pages are shared by every response using them, so they must not be modified.
+
+    Parameters
+    ----------
+    name : str
+        The name of the cache in the metrics.
+    max_size : int
+        How many page sets are kept, the least recently used are evicted.
+    requests : Counter | None
+        Counts lookups by cache name and result ("hit" or "miss"), see `BotMetrics`.
+    """
+
+    def __init__(self, name: str, max_size: int = 256, requests: Counter | None = None) -> None:
+        self.name = name
+        self.max_size = max_size
+        self.requests = requests
+        self.hits: int = 0
+        self.misses: int = 0
+
+        self._pages: collections.OrderedDict[PageKey, list[disnake.Embed]] = (
+            collections.OrderedDict()
+        )
+
+    def __len__(self) -> int:
+        """Return the amount of cached page sets."""
+        return len(self._pages)
+
+    def get(self, key: PageKey) -> list[disnake.Embed] | None:
+        """Return the pages of `key` if they are cached.
+
+        Only hits are counted, a miss is expected to be followed by `get_or_build`.
+        """
+        pages = self._pages.get(key)
+        if pages is not None:
+            self._hit(key)
+        return pages
+
+    def get_or_build(
+        self,
+        key: PageKey,
+        build: Callable[[], list[disnake.Embed]],
+    ) -> list[disnake.Embed]:
+        """Return the pages of `key`, calling `build` to render them on a miss."""
+        pages = self._pages.get(key)
+        if pages is not None:
+            self._hit(key)
+            return pages
+
+        self.misses += 1
+        if self.requests is not None:
+            self.requests.inc(self.name, "miss")
+        pages = self._pages[key] = build()
+        if len(self._pages) > self.max_size:
+            self._pages.popitem(last=False)
+        return pages
+
+    def _hit(self, key: PageKey) -> None:
+        self.hits += 1
+        self._pages.move_to_end(key)
+        if self.requests is not None:
+            self.requests.inc(self.name, "hit")
+
+    @property
+    def hit_rate(self) -> float:
+        """Return the share of lookups served from the cache."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def clear(self) -> None:
+        """Forget every page set, e.g. after the commands changed."""
+        self._pages.clear()
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import typing as t
+
+import aiohttp
+
+from src import log
+
+if t.TYPE_CHECKING:
+    from types import SimpleNamespace
+
+logger = log.get_logger(__name__)
+
+__all__ = (
+    "PoolMonitor",
+    "create_connector",
+)
+
+
+def create_connector(
+    *,
+    limit: int = 100,
+    limit_per_host: int = 10,
+    dns_cache_ttl: int | None = 300,
+    keepalive_timeout: float = 30.0,
+    happy_eyeballs_delay: float | None = 0.25,
+) -> aiohttp.TCPConnector:
+    """Create a tuned `aiohttp.TCPConnector` to be shared by an `APIHTTPClient`.
+
+    Parameters
+    ----------
+    limit : int
+        The total amount of simultaneous connections. 0 means unlimited.
+    limit_per_host : int
+        The amount of simultaneous connections to a single host. 0 means unlimited.
+    dns_cache_ttl : int | None
+        How long, in seconds, resolved addresses are cached. None caches forever.
+    keepalive_timeout : float
+        How long, in seconds, an idle connection is kept open for reuse.
+    happy_eyeballs_delay : float | None
+        The delay between connection attempts to the resolved addresses (RFC 8305).
+        None disables happy eyeballs. Ignored on aiohttp versions that don't support it.
+
+    Returns
+    -------
+    aiohttp.TCPConnector
+        The connector, to be passed to `APIHTTPClient`.
+    """
+    kwargs: dict[str, t.Any] = {
+        "limit": limit,
+        "limit_per_host": limit_per_host,
+        "ttl_dns_cache": dns_cache_ttl,
+        "use_dns_cache": True,
+        "keepalive_timeout": keepalive_timeout,
+    }
+
+    try:
+        return aiohttp.TCPConnector(**kwargs, happy_eyeballs_delay=happy_eyeballs_delay)
+    except TypeError:
+        # happy_eyeballs_delay was added in aiohttp 3.10
+        logger.debug("aiohttp does not support happy_eyeballs_delay, ignoring it")
+        return aiohttp.TCPConnector(**kwargs)
+
+
+class PoolMonitor:
+    """Collect connection pool telemetry through aiohttp's request tracing.
+
+    Attach `trace_config` to a session and read `stats` to size the pool.
+    """
+
+    def __init__(self) -> None:
+        self.created: int = 0
+        self.reused: int = 0
+        self.queued: int = 0
+        self.total_wait: float = 0.0
+        self.max_wait: float = 0.0
+
+        self.trace_config = aiohttp.TraceConfig()
+        self.trace_config.on_connection_queued_start.append(self._on_queued_start)
+        self.trace_config.on_connection_queued_end.append(self._on_queued_end)
+        self.trace_config.on_connection_create_end.append(self._on_create_end)
+        self.trace_config.on_connection_reuseconn.append(self._on_reuseconn)
+
+    async def _on_queued_start(
+        self,
+        session: aiohttp.ClientSession,
+        ctx: SimpleNamespace,
+        _: aiohttp.TraceConnectionQueuedStartParams,
+    ) -> None:
+        ctx.queued_at = session.loop.time()
+
+    async def _on_queued_end(
+        self,
+        session: aiohttp.ClientSession,
+        ctx: SimpleNamespace,
+        _: aiohttp.TraceConnectionQueuedEndParams,
+    ) -> None:
+        waited = session.loop.time() - getattr(ctx, "queued_at", session.loop.time())
+        self.queued += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+
+    async def _on_create_end(
+        self,
+        _session: aiohttp.ClientSession,
+        _ctx: SimpleNamespace,
+        _: aiohttp.TraceConnectionCreateEndParams,
+    ) -> None:
+        self.created += 1
+
+    async def _on_reuseconn(
+        self,
+        _session: aiohttp.ClientSession,
+        _ctx: SimpleNamespace,
+        _: aiohttp.TraceConnectionReuseconnParams,
+    ) -> None:
+        self.reused += 1
+
+    def stats(self, connector: aiohttp.BaseConnector | None) -> dict[str, int | float]:
+        """Return the current pool usage and the collected counters.
+
+        Parameters
+        ----------
+        connector : aiohttp.BaseConnector | None
+            The connector of the monitored session.
+
+        Returns
+        -------
+        dict[str, int | float]
+            Open, idle and acquired connections, the amount of requests waiting for a free
+            connection, and the created/reused/queued counters with wait times in seconds.
+        """
+        # aiohttp doesn't expose pool usage publicly, so read it defensively.
+        idle = sum(len(conns) for conns in getattr(connector, "_conns", {}).values())
+        acquired = len(getattr(connector, "_acquired", ()))
+        waiting = sum(len(waiters) for waiters in getattr(connector, "_waiters", {}).values())
+
+        return {
+            "open": idle + acquired,
+            "idle": idle,
+            "acquired": acquired,
+            "waiting": waiting,
+            "limit": getattr(connector, "limit", 0),
+            "limit_per_host": getattr(connector, "limit_per_host", 0),
+            "created": self.created,
+            "reused": self.reused,
+            "queued": self.queued,
+            "avg_wait": self.total_wait / self.queued if self.queued else 0.0,
+            "max_wait": self.max_wait,
+        }
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import random
+import time
+import typing as t
+from email.utils import parsedate_to_datetime
+
+from src import log
+
+if t.TYPE_CHECKING:
+    from collections.abc import Mapping
+
+logger = log.get_logger(__name__)
+
+__all__ = (
+    "RateLimiter",
+    "TokenBucket",
+    "backoff_delay",
+    "parse_retry_after",
+)
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Parse a `Retry-After` header into a delay in seconds.
+
+    Parameters
+    ----------
+    value : str | None
+        The header value, either a number of seconds or an HTTP date.
+
+    Returns
+    -------
+    float | None
+        The delay in seconds, or None if the header is missing or malformed.
+    """
+    if not value:
+        return None
+
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=dt.timezone.utc)
+    return max((date - dt.datetime.now(tz=dt.timezone.utc)).total_seconds(), 0.0)
+
+
+def backoff_delay(attempt: int, *, base: float = 0.5, cap: float = 30.0) -> float:
+    """Return a jittered exponential backoff delay for a retry attempt.
+
+    Uses "full jitter": a random delay between 0 and `base * 2 ** attempt`, capped at `cap`.
+    """
+    return random.uniform(0, min(cap, base * 2**attempt))  # noqa: S311
+
+
+class TokenBucket:
+    """A token bucket that queues callers until they are allowed to send a request.
+
+    Parameters
+    ----------
+    rate : float | None
+        How many tokens are added per second. None means the bucket only throttles
+        when the upstream tells it to.
+    capacity : int
+        The maximum amount of tokens, i.e. the allowed burst size.
+    """
+
+    def __init__(self, rate: float | None = None, capacity: int = 1) -> None:
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+
+        self.tokens: float = float(self.capacity)
+        self.blocked_until: float = 0.0
+
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        if self.rate is not None:
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> float:
+        """Wait for a token to become available.
+
+        Returns
+        -------
+        float
+            How long, in seconds, the caller had to wait.
+        """
+        started = time.monotonic()
+
+        # callers are served in order, so a burst queues up instead of racing for tokens.
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if self.blocked_until > now:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+
+                if self.rate is None:
+                    break
+
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    break
+
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+        return time.monotonic() - started
+
+    def block(self, seconds: float) -> None:
+        """Stop handing out tokens for the given amount of seconds."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        """Block the bucket when the upstream reports that its limit is exhausted.
+
+        Understands `X-RateLimit-Remaining` together with either `X-RateLimit-Reset-After`
+        (seconds) or `X-RateLimit-Reset` (epoch seconds).
+        """
+        remaining = headers.get("X-RateLimit-Remaining")
+        if remaining is None:
+            return
+
+        try:
+            if float(remaining) > 0:
+                return
+
+            if (reset_after := headers.get("X-RateLimit-Reset-After")) is not None:
+                delay = float(reset_after)
+            elif (reset := headers.get("X-RateLimit-Reset")) is not None:
+                delay = float(reset) - time.time()
+            else:
+                return
+        except ValueError:
+            return
+
+        if delay > 0:
+            self.block(delay)
+
+
+class RateLimiter:
+    """Hand out a `TokenBucket` per upstream host.
+
+    Parameters
+    ----------
+    rate : float | None, optional
+        The default amount of requests per second allowed for a host. Defaults to None,
+        which only throttles on `Retry-After` and `X-RateLimit-*` headers.
+    capacity : int, optional
+        The default burst size for a host.
+    limits : Mapping[str, tuple[float | None, int]] | None, optional
+        Per-host `(rate, capacity)` overrides.
+    """
+
+    def __init__(
+        self,
+        rate: float | None = None,
+        capacity: int = 1,
+        *,
+        limits: Mapping[str, tuple[float | None, int]] | None = None,
+    ) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.limits = dict(limits or {})
+
+        self._buckets: dict[str, TokenBucket] = {}
+
+    def get_bucket(self, host: str) -> TokenBucket:
+        """Return the bucket for a host, creating it if necessary."""
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            rate, capacity = self.limits.get(host, (self.rate, self.capacity))
+            bucket = self._buckets[host] = TokenBucket(rate, capacity)
+        return bucket
+
+    async def acquire(self, host: str) -> float:
+        """Wait until a request to `host` is allowed."""
+        waited = await self.get_bucket(host).acquire()
+        if waited > 0.1:  # noqa: PLR2004
+            logger.debug(f"Waited {waited:.2f}s for the {host} rate limit")
+        return waited
+
+    def block(self, host: str, seconds: float) -> None:
+        """Stop sending requests to `host` for the given amount of seconds."""
+        logger.warning(
+            "Rate limited by %s, pausing requests for %.2fs",
+            host,
+            seconds,
+            extra={"dedup_key": host},
+        )
+        self.get_bucket(host).block(seconds)
+
+    def update_from_headers(self, host: str, headers: Mapping[str, str]) -> None:
+        """Feed the rate limit headers of a response to the bucket of its host."""
+        self.get_bucket(host).update_from_headers(headers)
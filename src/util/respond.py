@@ -0,0 +1,148 @@
+"""Respond to interactions in as few REST round trips as possible."""
+
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import typing as t
+
+import disnake
+
+from src import log
+
+if t.TYPE_CHECKING:
+    from types import TracebackType
+
+    from typing_extensions import Self
+
+logger = log.get_logger(__name__)
+
+__all__ = ("Responder",)
+
+
+class Responder:
+    """Send a handler's reply directly, deferring only if the handler is slow.
+
+    Discord wants an interaction response within 3 seconds. Deferring right away costs an
+    extra round trip, and replying ephemerally after a public defer costs two more (delete
+    the original response, then send a followup). Instead, the interaction is only deferred
+    once `deadline` has passed without a reply, so fast handlers reply in one round trip.
+    The deadline counts from when Discord created the interaction, so time spent before the
+    handler started, e.g. waiting for the gateway or lazily loading an extension, is included.
+
+    Use it as an async context manager around the handler::
+
+        async with Responder(inter) as responder:
+            await responder.send("Pong!")
+
+    Parameters
+    ----------
+    inter : disnake.Interaction
+        The interaction to respond to.
+    deadline : float
+        How long, in seconds, after the interaction was created it is deferred if there is
+        no reply yet.
+    ephemeral : bool
+        Whether to defer ephemerally, and the default visibility of `send`.
+    """
+
+    def __init__(
+        self,
+        inter: disnake.Interaction,
+        *,
+        deadline: float = 1.5,
+        ephemeral: bool = False,
+    ) -> None:
+        self.inter = inter
+        self.deadline = deadline
+        self.ephemeral = ephemeral
+        self.deferred: bool = False
+        self.sent: bool = False
+
+        self._lock = asyncio.Lock()
+        self._timer: asyncio.TimerHandle | None = None
+        self._defer_task: asyncio.Task[None] | None = None
+
+    async def __aenter__(self) -> Self:
+        """Start the deadline."""
+        if not self.inter.response.is_done():
+            age = (dt.datetime.now(tz=dt.timezone.utc) - self.inter.created_at).total_seconds()
+            # clamped, so a clock running behind Discord's never delays the defer.
+            delay = min(max(self.deadline - age, 0.0), self.deadline)
+            self._timer = asyncio.get_running_loop().call_later(delay, self._on_deadline)
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Stop the deadline."""
+        self._cancel_timer()
+        if self._defer_task is not None and not self._defer_task.done():
+            self._defer_task.cancel()
+
+    def _cancel_timer(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _on_deadline(self) -> None:
+        self._timer = None
+        self._defer_task = asyncio.create_task(self._defer())
+
+    async def _defer(self) -> None:
+        async with self._lock:
+            if self.inter.response.is_done():
+                return
+            await self.inter.response.defer(ephemeral=self.ephemeral)
+            self.deferred = True
+
+        name = getattr(getattr(self.inter, "data", None), "name", None)
+        logger.debug(f"Deferred {name or self.inter.type} {self.deadline}s after it was created")
+
+    async def send(
+        self,
+        content: str | None = None,
+        *,
+        ephemeral: bool | None = None,
+        **kwargs: t.Any,  # noqa: ANN401
+    ) -> None:
+        """Reply to the interaction, through whichever route is cheapest at this point.
+
+        Replies after the first one are sent as followups.
+
+        Parameters
+        ----------
+        content : str | None
+            The content of the reply.
+        ephemeral : bool | None
+            Whether only the user can see the reply. Defaults to the responder's visibility.
+        **kwargs
+            Passed to `send_message`, e.g. `embed`, `components` or `view`.
+        """
+        ephemeral = self.ephemeral if ephemeral is None else ephemeral
+
+        async with self._lock:
+            self._cancel_timer()
+
+            if self.sent:
+                await self.inter.followup.send(
+                    content or disnake.utils.MISSING,
+                    ephemeral=ephemeral,
+                    **kwargs,
+                )
+            elif not self.inter.response.is_done():
+                await self.inter.response.send_message(content, ephemeral=ephemeral, **kwargs)
+            elif ephemeral and not self.ephemeral:
+                # a public defer can't become ephemeral, replace it with a followup.
+                await self.inter.delete_original_response()
+                await self.inter.followup.send(
+                    content or disnake.utils.MISSING,
+                    ephemeral=True,
+                    **kwargs,
+                )
+            else:
+                await self.inter.edit_original_response(content, **kwargs)
+            self.sent = True
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import contextlib
+import time
+import typing as t
+
+__all__ = ("StartupTimer",)
+
+
+class StartupTimer:
+    """Measure how long each phase of the startup takes.
+
+    Phases are kept in the order they were started, and a phase is only recorded once so
+    reconnects don't overwrite the cold start measurements.
+    """
+
+    def __init__(self) -> None:
+        self.phases: dict[str, float] = {}
+        self._started: dict[str, float] = {}
+
+    def record(self, name: str, seconds: float) -> None:
+        """Record a phase measured elsewhere."""
+        self.phases.setdefault(name, seconds)
+
+    def begin(self, name: str) -> None:
+        """Start measuring a phase that ends in another function, see `end`."""
+        if name not in self.phases:
+            self._started.setdefault(name, time.perf_counter())
+
+    def end(self, name: str) -> None:
+        """Stop measuring a phase started with `begin`. Does nothing if it isn't running."""
+        started = self._started.pop(name, None)
+        if started is not None:
+            self.record(name, time.perf_counter() - started)
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> t.Iterator[None]:
+        """Measure the phase running inside the `with` block."""
+        self.begin(name)
+        try:
+            yield
+        finally:
+            self.end(name)
+
+    @property
+    def total(self) -> float:
+        """Return the total time, in seconds, spent in the recorded phases."""
+        return sum(self.phases.values())
@@ -0,0 +1,195 @@
+"""Watch directories with Linux inotify, through ctypes, instead of polling mtimes."""
+
+from __future__ import annotations
+
+import asyncio
+import ctypes
+import ctypes.util
+import os
+import struct
+import sys
+import typing as t
+from pathlib import Path
+
+from src import log
+
+if t.TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+logger = log.get_logger(__name__)
+
+__all__ = (
+    "Inotify",
+    "ReloadWatcher",
+)
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, "O_CLOEXEC", 0)
+
+# files are reloaded once they are fully written, moved in or removed.
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE
+
+# struct inotify_event: int wd, uint32 mask, uint32 cookie, uint32 len, char name[len]
+_EVENT = struct.Struct("iIII")
+
+
+class Inotify:
+    """A minimal non-blocking inotify instance.
+
+    Raises
+    ------
+    OSError
+        If inotify isn't available on this platform.
+    """
+
+    _libc: ctypes.CDLL | None = None
+
+    def __init__(self) -> None:
+        libc = self._load_libc()
+        if libc is None:
+            msg = "inotify is only available on Linux."
+            raise OSError(msg)
+        self._lib = libc
+
+        self.fd: int = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+
+        self._watches: dict[int, Path] = {}
+
+    @classmethod
+    def _load_libc(cls: type[Inotify]) -> ctypes.CDLL | None:
+        if cls._libc is None and sys.platform.startswith("linux"):
+            try:
+                libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            except OSError:
+                return None
+            if hasattr(libc, "inotify_init1") and hasattr(libc, "inotify_add_watch"):
+                cls._libc = libc
+        return cls._libc
+
+    @classmethod
+    def supported(cls: type[Inotify]) -> bool:
+        """Return whether inotify can be used on this platform."""
+        return cls._load_libc() is not None
+
+    def add_watch(self, path: str | Path, mask: int = WATCH_MASK) -> None:
+        """Watch a directory for the events in `mask`."""
+        path = Path(path)
+        wd = self._lib.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), str(path))
+        self._watches[wd] = path
+
+    def read(self) -> list[tuple[Path, int]]:
+        """Return the `(path, mask)` of every pending event without blocking."""
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events: list[tuple[Path, int]] = []
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                logger.warning("inotify queue overflowed, some changes were missed")
+            if wd in self._watches and name:
+                events.append((self._watches[wd] / os.fsdecode(name), mask))
+
+        return events
+
+    def close(self) -> None:
+        """Close the inotify instance, removing every watch."""
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class ReloadWatcher:
+    """Call back with the files changed in some directories, debouncing bursts of edits.
+
+    Parameters
+    ----------
+    paths : Iterable[str | Path]
+        The directories to watch, not recursively.
+    on_change : Callable[[set[Path]], None]
+        Called with every file changed during a burst, once the burst is over.
+    debounce : float
+        How long, in seconds, to wait for more changes before calling back.
+    suffixes : Iterable[str]
+        The file suffixes to report, e.g. `.py`.
+    """
+
+    def __init__(
+        self,
+        paths: Iterable[str | Path],
+        on_change: Callable[[set[Path]], None],
+        *,
+        debounce: float = 0.25,
+        suffixes: Iterable[str] = (".py", ".json"),
+    ) -> None:
+        self.paths = [Path(path) for path in paths]
+        self.on_change = on_change
+        self.debounce = debounce
+        self.suffixes = frozenset(suffixes)
+
+        self._inotify: Inotify | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._pending: set[Path] = set()
+        self._timer: asyncio.TimerHandle | None = None
+
+    def start(self, loop: asyncio.AbstractEventLoop | None = None) -> None:
+        """Start watching, woken up by the event loop only when something changes."""
+        self._loop = loop or asyncio.get_running_loop()
+        self._inotify = Inotify()
+        for path in self.paths:
+            self._inotify.add_watch(path)
+
+        self._loop.add_reader(self._inotify.fd, self._on_readable)
+        logger.info(f"Watching {', '.join(map(str, self.paths))} for changes")
+
+    def stop(self) -> None:
+        """Stop watching."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        if self._inotify is not None and self._loop is not None:
+            self._loop.remove_reader(self._inotify.fd)
+            self._inotify.close()
+            self._inotify = None
+
+    def _on_readable(self) -> None:
+        if self._inotify is None or self._loop is None:
+            return
+
+        changed = {path for path, _ in self._inotify.read() if path.suffix in self.suffixes}
+        if not changed:
+            return
+
+        self._pending |= changed
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = self._loop.call_later(self.debounce, self._flush)
+
+    def _flush(self) -> None:
+        self._timer = None
+        changed, self._pending = self._pending, set()
+
+        try:
+            self.on_change(changed)
+        except Exception:
+            logger.exception("Failed to handle file changes")